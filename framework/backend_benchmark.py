@@ -0,0 +1,108 @@
+"""
+Side by side latency of driver operations on selenium (chromedriver) and DevTools protocol backends.
+
+Usage: python -m framework.backend_benchmark --url http://127.0.0.1:8765/ru/clans-leaderboard/ --locator "table tr"
+"""
+import argparse
+import statistics
+import time
+
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.webdriver import WebDriver as ChromeWebDriver
+from selenium.webdriver.common.by import By
+
+from framework.cdp import CdpDriver
+
+
+def start_driver(backend, headless):
+    options = ChromeOptions()
+    if headless:
+        options.headless = True
+        for argument in ('--headless', '--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage'):
+            options.add_argument(argument)
+    if backend == 'cdp':
+        return CdpDriver.launch(headless=headless, arguments=options.arguments)
+    return ChromeWebDriver(options=options)
+
+
+def operations(driver, locator, click_locator, input_locator):
+    """
+    Measured operations of the benchmark
+
+    :return: list of tuple(name, callable without arguments)
+    """
+    element = driver.find_element(By.CSS_SELECTOR, locator)
+    result = [
+        ('find_element', lambda: driver.find_element(By.CSS_SELECTOR, locator)),
+        ('find_elements', lambda: driver.find_elements(By.CSS_SELECTOR, locator)),
+        ('text', lambda: element.text),
+        ('get_attribute', lambda: element.get_attribute('class')),
+        ('is_displayed', element.is_displayed),
+        ('execute_script', lambda: driver.execute_script('return document.title;')),
+        ('window_handles', lambda: driver.window_handles),
+    ]
+    if click_locator:
+        result.append(('click', lambda: driver.find_element(By.CSS_SELECTOR, click_locator).click()))
+    if input_locator:
+        field = driver.find_element(By.CSS_SELECTOR, input_locator)
+        result.append(('send_keys[10]', lambda: (field.clear(), field.send_keys('0123456789'))))
+    return result
+
+
+def measure(backend, options):
+    """
+    Run every operation `options.iterations` times on a new browser session of backend
+
+    :return: dict object {operation: list of durations in seconds}
+    """
+    driver = start_driver(backend, not options.headed)
+    try:
+        started = time.perf_counter()
+        driver.get(options.url)
+        timings = {'get': [time.perf_counter() - started]}
+        for name, operation in operations(driver, options.locator, options.click_locator, options.input_locator):
+            operation()  # warm up
+            timings[name] = []
+            for _ in range(options.iterations):
+                started = time.perf_counter()
+                operation()
+                timings[name].append(time.perf_counter() - started)
+        return timings
+    finally:
+        driver.quit()
+
+
+def report(results):
+    """
+    :param results: dict object {backend: measure() result}
+    :return: list of strings: median ms per operation and backend, speedup of the last backend
+    """
+    backends = list(results)
+    lines = [f'{"operation":<16}' + ''.join(f'{backend + " ms":>14}' for backend in backends) + f'{"speedup":>10}']
+    for name in results[backends[0]]:
+        medians = [statistics.median(results[backend][name]) * 1000 for backend in backends]
+        speedup = f'{medians[0] / medians[-1]:.1f}x' if medians[-1] else '-'
+        lines.append(f'{name:<16}' + ''.join(f'{median:>14.2f}' for median in medians) + f'{speedup:>10}')
+    return lines
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Latency of driver operations on selenium and DevTools backends')
+    parser.add_argument('--url', required=True, help='page to benchmark on')
+    parser.add_argument('--locator', default='body', help='css locator of element for read operations')
+    parser.add_argument('--click-locator', default=None,
+                        help='css locator of element to click, click is skipped if not given')
+    parser.add_argument('--input-locator', default=None, help='css locator of input to type into')
+    parser.add_argument('--iterations', type=int, default=50, help='repeats of every operation')
+    parser.add_argument('--backends', default='selenium,cdp', help='comma separated backends to compare')
+    parser.add_argument('--headed', action='store_true', help='run browsers with window')
+    options = parser.parse_args(args)
+
+    results = {backend: measure(backend, options) for backend in options.backends.split(',')}
+    print(f'Url: {options.url}, {options.iterations} iterations, median per operation')
+    print('\n'.join(report(results)))
+    return results
+
+
+if __name__ == '__main__':
+    main()
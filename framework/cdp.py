@@ -0,0 +1,614 @@
+"""
+DevTools protocol driver backend: commands go straight to Chromium over the DevTools websocket, without chromedriver.
+Implements the subset of selenium driver used by the framework: find elements, click, send keys, text, attributes,
+scripts, tabs, cookies, window size and screenshots.
+"""
+import base64
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+try:
+    import websocket
+except ImportError:  # optional dependency of DevTools backend
+    websocket = None
+
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    JavascriptException,
+    NoSuchElementException,
+    NoSuchWindowException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+from framework.tracer import sleep
+
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+LAUNCH_TIMEOUT = 30
+OBJECT_GROUP = 'htfw'
+STALE_MARKER = 'htfw: stale element'
+STALE_ERRORS = ('Could not find object with given id', 'Cannot find context with specified id')
+
+# key: (key name, windows virtual key code, text) for selenium Keys used in tests
+SPECIAL_KEYS = {
+    Keys.ENTER: ('Enter', 13, '\r'),
+    Keys.RETURN: ('Enter', 13, '\r'),
+    Keys.BACKSPACE: ('Backspace', 8, ''),
+    Keys.TAB: ('Tab', 9, ''),
+    Keys.ESCAPE: ('Escape', 27, ''),
+    Keys.DELETE: ('Delete', 46, ''),
+}
+
+ELEMENT_FUNCTION = ('function(...args) {{ if (!this.isConnected) throw new Error("%s"); '
+                    'return ({0}).apply(this, args); }}' % STALE_MARKER)
+IS_DISPLAYED_FUNCTION = """function() {
+    const style = getComputedStyle(this);
+    return style.visibility !== 'hidden' && style.display !== 'none' && this.getClientRects().length > 0;
+}"""
+CLICK_POINT_FUNCTION = """function() {
+    this.scrollIntoView({block: 'center', inline: 'center'});
+    const rect = this.getBoundingClientRect();
+    if (!rect.width || !rect.height) return {state: 'not_interactable'};
+    const x = rect.left + rect.width / 2, y = rect.top + rect.height / 2;
+    const hit = document.elementFromPoint(x, y);
+    if (hit && hit !== this && !this.contains(hit)) return {state: 'intercepted', by: hit.outerHTML.slice(0, 150)};
+    return {state: 'ok', x: x, y: y};
+}"""
+ATTRIBUTE_FUNCTION = """function(name) {
+    const property = this[name];
+    if (property !== undefined && property !== null && typeof property !== 'object' && typeof property !== 'function') {
+        return property === true ? 'true' : property === false ? null : String(property);
+    }
+    return this.getAttribute(name);
+}"""
+FOCUS_FUNCTION = """function() {
+    this.focus();
+    if (typeof this.value === 'string' && typeof this.setSelectionRange === 'function') {
+        try { this.setSelectionRange(this.value.length, this.value.length); } catch (e) {}
+    }
+}"""
+CLEAR_FUNCTION = """function() {
+    this.value = '';
+    this.dispatchEvent(new Event('input', {bubbles: true}));
+    this.dispatchEvent(new Event('change', {bubbles: true}));
+}"""
+FIND_SCRIPTS = {
+    (By.CSS_SELECTOR, False): 'document.querySelector({0})',
+    (By.CSS_SELECTOR, True): 'Array.from(document.querySelectorAll({0}))',
+    (By.XPATH, False): 'document.evaluate({0}, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)'
+                       '.singleNodeValue',
+    (By.XPATH, True): '(() => {{ const result = document.evaluate({0}, document, null, '
+                      'XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null); '
+                      'return Array.from({{length: result.snapshotLength}}, (_, i) => result.snapshotItem(i)); }})()',
+}
+LOCATOR_TO_CSS = {
+    By.ID: '#{0}',
+    By.CLASS_NAME: '.{0}',
+    By.NAME: '[name="{0}"]',
+    By.TAG_NAME: '{0}',
+}
+
+
+class CdpError(WebDriverException):
+    """ Error response of DevTools command """
+
+
+class CdpConnection:
+    """
+    DevTools websocket connection. Commands are sent without waiting for previous responses (pipelining),
+    responses are matched by id in the reader thread
+
+    :param ws_url: browser websocket url ~ ws://127.0.0.1:9222/devtools/browser/<id>
+    :param timeout: seconds to wait for a command response
+    """
+
+    def __init__(self, ws_url, timeout=LAUNCH_TIMEOUT):
+        if websocket is None:
+            raise Exception('DevTools backend requires "websocket-client" package')
+        self.ws = websocket.create_connection(ws_url, timeout=timeout, suppress_origin=True,
+                                             enable_multithread=True)
+        self.ws.settimeout(None)  # reader thread waits for messages without timeout
+        self.timeout = timeout
+        self.ids = itertools.count(1)
+        self.pending = {}
+        self.listeners = {}
+        self.lock = threading.Lock()
+        self.closed = False
+        self.reader = threading.Thread(target=self._read, daemon=True)
+        self.reader.start()
+
+    def send(self, method, params=None, session_id=None):
+        """
+        Send command without waiting for response
+
+        :param method: DevTools method ~ 'Runtime.evaluate'
+        :param params: dict object of method params
+        :param session_id: target session id. Browser target if not given
+        :return: Future object with command result
+        """
+        future = Future()
+        with self.lock:
+            if self.closed:
+                raise WebDriverException('DevTools connection is closed')
+            message_id = next(self.ids)
+            self.pending[message_id] = future
+            message = {'id': message_id, 'method': method, 'params': params or {}}
+            if session_id:
+                message['sessionId'] = session_id
+            self.ws.send(json.dumps(message))
+        return future
+
+    def execute(self, method, params=None, session_id=None, timeout=None):
+        """
+        Send command and wait for its result
+
+        :return: dict object - command result
+        """
+        return self.send(method, params, session_id).result(timeout or self.timeout)
+
+    def pipeline(self, commands, session_id=None, timeout=None):
+        """
+        Send several commands at once and wait for all results: one round trip instead of len(commands)
+
+        :param commands: list of tuple(method, params)
+        :return: list of results in order of commands
+        """
+        futures = [self.send(method, params, session_id) for method, params in commands]
+        return [future.result(timeout or self.timeout) for future in futures]
+
+    def on(self, method, callback):
+        """
+        Subscribe to DevTools event
+
+        :param method: event name ~ 'Target.targetCreated'
+        :param callback: callable(params, session_id). Called in the reader thread
+        """
+        self.listeners.setdefault(method, []).append(callback)
+
+    def off(self, method, callback):
+        callbacks = self.listeners.get(method, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def _read(self):
+        while True:
+            try:
+                message = json.loads(self.ws.recv())
+            except Exception:  # connection closed
+                break
+            if 'id' in message:
+                future = self.pending.pop(message['id'], None)
+                if future is None:
+                    continue
+                if 'error' in message:
+                    future.set_exception(CdpError(message['error'].get('message', str(message['error']))))
+                else:
+                    future.set_result(message.get('result', {}))
+            else:
+                for callback in list(self.listeners.get(message.get('method'), ())):
+                    callback(message.get('params', {}), message.get('sessionId'))
+
+        with self.lock:
+            self.closed = True
+            pending, self.pending = self.pending, {}
+        for future in pending.values():
+            future.set_exception(WebDriverException('DevTools connection is closed'))
+
+    def close(self):
+        try:
+            self.ws.close()
+        finally:
+            self.reader.join(timeout=5)
+
+
+class CdpElement:
+    """
+    DOM element referenced by DevTools remote object id. Driver is kept in `_parent` like by selenium WebElement,
+    so framework.tabs.TabDriver re-parents elements of both backends the same way
+    """
+
+    def __init__(self, driver, object_id):
+        self._parent = driver
+        self.id = object_id
+
+    @property
+    def parent(self):
+        return self._parent
+
+    def __eq__(self, other):
+        return isinstance(other, CdpElement) and self.parent.call_function(
+            'function(other) { return this === other; }', self, other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def _call(self, function, *args):
+        return self.parent.call_function(ELEMENT_FUNCTION.format(function), self, *args)
+
+    @property
+    def text(self):
+        return self._call('function() { return this.innerText; }')
+
+    @property
+    def tag_name(self):
+        return self._call('function() { return this.tagName.toLowerCase(); }')
+
+    def get_attribute(self, name):
+        return self._call(ATTRIBUTE_FUNCTION, name)
+
+    def is_displayed(self):
+        return self._call(IS_DISPLAYED_FUNCTION)
+
+    def is_enabled(self):
+        return self._call('function() { return !this.disabled; }')
+
+    def click(self):
+        point = self._call(CLICK_POINT_FUNCTION)
+        if point['state'] == 'not_interactable':
+            raise ElementNotInteractableException('Element has no size to click')
+        if point['state'] == 'intercepted':
+            raise ElementClickInterceptedException(f'Click would be received by other element: {point["by"]}')
+        mouse = {'x': point['x'], 'y': point['y'], 'button': 'left', 'clickCount': 1}
+        self.parent.execute_pipeline([
+            ('Input.dispatchMouseEvent', {'type': 'mouseMoved', 'x': point['x'], 'y': point['y']}),
+            ('Input.dispatchMouseEvent', {'type': 'mousePressed', **mouse}),
+            ('Input.dispatchMouseEvent', {'type': 'mouseReleased', **mouse}),
+        ])
+
+    def send_keys(self, *value):
+        self._call(FOCUS_FUNCTION)
+        self.parent.execute_pipeline(key_events(''.join(str(item) for item in value)))
+
+    def clear(self):
+        self._call(CLEAR_FUNCTION)
+
+
+def key_events(text):
+    """
+    Key events typing text into focused element
+
+    :param text: string object, may contain selenium Keys
+    :return: list of tuple('Input.dispatchKeyEvent', params)
+    """
+    events = []
+    for char in text:
+        key, code, char_text = SPECIAL_KEYS.get(char, (char, 0, char))
+        down = {'type': 'keyDown', 'key': key, 'text': char_text, 'unmodifiedText': char_text}
+        if code:
+            down['windowsVirtualKeyCode'] = code
+        events.append(('Input.dispatchKeyEvent', down))
+        events.append(('Input.dispatchKeyEvent', {'type': 'keyUp', 'key': key}))
+    return events
+
+
+class SwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.switch_to_target(handle)
+
+    def new_window(self, type_hint='tab'):
+        target_id = self.driver.connection.execute('Target.createTarget', {'url': 'about:blank'})['targetId']
+        with self.driver.targets_changed:
+            self.driver.targets_changed.wait_for(lambda: target_id in self.driver.targets, LAUNCH_TIMEOUT)
+        self.driver.switch_to_target(target_id)
+
+
+class CdpDriver:
+    """
+    Browser session over DevTools protocol with selenium driver compatible interface
+
+    :param connection: CdpConnection to the browser target
+    :param process: launched browser process, quit with the driver
+    :param user_data_dir: temporary profile directory, removed on quit
+    """
+
+    def __init__(self, connection, process=None, user_data_dir=None):
+        self.connection = connection
+        self.process = process
+        self.user_data_dir = user_data_dir
+        self.sessions = {}
+        self.new_document_scripts = []
+        self.script_timeout = LAUNCH_TIMEOUT
+        self.target_id = None
+        self.session_id = None
+        self.targets = []
+        self.targets_changed = threading.Condition()
+        self.switch_to = SwitchTo(self)
+
+        connection.on('Target.targetCreated', self._on_target_created)
+        connection.on('Target.targetDestroyed', self._on_target_destroyed)
+        connection.execute('Target.setDiscoverTargets', {'discover': True})
+        for target in connection.execute('Target.getTargets')['targetInfos']:
+            self._on_target_created({'targetInfo': target}, None)
+        if not self.targets:
+            connection.execute('Target.createTarget', {'url': 'about:blank'})
+        self.switch_to_target(self.window_handles[0])
+
+    @classmethod
+    def launch(cls, binary=None, headless=True, arguments=(), timeout=LAUNCH_TIMEOUT):
+        """
+        Launch local Chromium with DevTools websocket and connect to it
+
+        :param binary: browser executable. `CHROME_BINARY` environment variable or first found in PATH by default
+        :param headless: run without window
+        :param arguments: additional browser arguments ~ ChromeOptions().arguments
+        :param timeout: seconds to wait for browser start
+        :return: CdpDriver object
+        """
+        binary = binary or os.environ.get('CHROME_BINARY') or next(
+            (shutil.which(name) for name in CHROME_BINARIES if shutil.which(name)), None)
+        if not binary:
+            raise WebDriverException(f'Chromium not found, set CHROME_BINARY. Looked for: {", ".join(CHROME_BINARIES)}')
+
+        user_data_dir = tempfile.mkdtemp(prefix='htfw-cdp-')
+        command = [binary, '--remote-debugging-port=0', f'--user-data-dir={user_data_dir}', '--no-first-run',
+                   '--no-default-browser-check', '--disable-background-networking']
+        if headless:
+            command += ['--headless', '--disable-gpu']
+        command += [argument for argument in arguments if argument not in command] + ['about:blank']
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        port_file = os.path.join(user_data_dir, 'DevToolsActivePort')
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(port_file) or len(open(port_file).read().split()) < 2:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                shutil.rmtree(user_data_dir, ignore_errors=True)
+                raise WebDriverException(f'Chromium DevTools endpoint not started: {binary}')
+            time.sleep(0.05)
+        port, path = open(port_file).read().split()[:2]
+        return cls(CdpConnection(f'ws://127.0.0.1:{port}{path}', timeout=timeout), process, user_data_dir)
+
+    # Commands
+
+    def execute(self, driver_command, params=None):
+        """
+        Send DevTools command to the current tab
+
+        :param driver_command: DevTools method ~ 'Runtime.evaluate'
+        :param params: dict object of method params
+        :return: dict object - command result
+        """
+        return self.connection.execute(driver_command, params, self.session_id,
+                                       timeout=max(self.connection.timeout, self.script_timeout))
+
+    def execute_pipeline(self, commands):
+        """
+        Send several DevTools commands to the current tab within one round trip
+
+        :param commands: list of tuple(method, params)
+        :return: list of results
+        """
+        return self.connection.pipeline(commands, self.session_id)
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        if cmd == 'Page.addScriptToEvaluateOnNewDocument':  # applied to tabs opened later too
+            if cmd_args in self.new_document_scripts:  # already applied to the tab by switch_to_target
+                return {}
+            self.new_document_scripts.append(cmd_args)
+        return self.execute(cmd, cmd_args)
+
+    # Scripts
+
+    def _argument(self, value):
+        return {'objectId': value.id} if isinstance(value, CdpElement) else {'value': value}
+
+    def _result(self, response, elements=False):
+        if 'exceptionDetails' in response:
+            details = response['exceptionDetails']
+            message = details.get('exception', {}).get('description') or details.get('text', '')
+            if STALE_MARKER in message:
+                raise StaleElementReferenceException(message)
+            raise JavascriptException(message)
+        result = response['result']
+        if elements:
+            return result
+        return result.get('value')
+
+    def call_function(self, function, this=None, *args, await_promise=False):
+        """
+        Call js function in the current document
+
+        :param function: js function declaration ~ 'function(a) { return this.innerText + a; }'
+        :param this: CdpElement used as `this`
+        :param args: function arguments, CdpElement objects are passed as DOM nodes
+        :param await_promise: wait for returned promise
+        :return: json serializable result
+        """
+        target = this or next((arg for arg in args if isinstance(arg, CdpElement)), None)
+        try:
+            if target is None:
+                expression = f'({function}).apply(window, {json.dumps(list(args))})'
+                response = self.execute('Runtime.evaluate', {
+                    'expression': expression, 'returnByValue': True, 'awaitPromise': await_promise,
+                    'objectGroup': OBJECT_GROUP})
+            else:
+                response = self.execute('Runtime.callFunctionOn', {
+                    'functionDeclaration': function, 'objectId': target.id,
+                    'arguments': [self._argument(arg) for arg in args],
+                    'returnByValue': True, 'awaitPromise': await_promise, 'objectGroup': OBJECT_GROUP})
+        except CdpError as exception:
+            if any(error in str(exception) for error in STALE_ERRORS):
+                raise StaleElementReferenceException(str(exception))
+            raise
+        return self._result(response)
+
+    def execute_script(self, script, *args):
+        return self.call_function(f'function() {{ {script} }}', None, *args)
+
+    def execute_async_script(self, script, *args):
+        function = ('function(...args) { return new Promise((resolve) => { '
+                    f'(function() {{ {script} }}).apply(this, [...args, resolve]); }}); }}')
+        return self.call_function(function, None, *args, await_promise=True)
+
+    # Elements
+
+    def _find(self, by, value, many):
+        if by in LOCATOR_TO_CSS:
+            by, value = By.CSS_SELECTOR, LOCATOR_TO_CSS[by].format(value)
+        if (by, many) not in FIND_SCRIPTS:
+            raise WebDriverException(f'Locator type "{by}" is not supported by DevTools backend')
+        response = self.execute('Runtime.evaluate', {
+            'expression': FIND_SCRIPTS[(by, many)].format(json.dumps(value)), 'objectGroup': OBJECT_GROUP})
+        return self._result(response, elements=True)
+
+    def find_element(self, by=By.CSS_SELECTOR, value=None):
+        result = self._find(by, value, many=False)
+        if result.get('subtype') == 'null' or 'objectId' not in result:
+            raise NoSuchElementException(f'Unable to locate element: {value}')
+        return CdpElement(self, result['objectId'])
+
+    def find_elements(self, by=By.CSS_SELECTOR, value=None):
+        array = self._find(by, value, many=True)
+        properties = self.execute('Runtime.getProperties', {'objectId': array['objectId'], 'ownProperties': True})
+        items = sorted((int(item['name']), item['value']['objectId']) for item in properties['result']
+                       if item['name'].isdigit() and 'objectId' in item.get('value', {}))
+        return [CdpElement(self, object_id) for _, object_id in items]
+
+    def type_with_pauses(self, element, text, pause):
+        """ Type text letter by letter with pauses. Backend hook of WebElement.type_slowly """
+        element._call(FOCUS_FUNCTION)
+        for index, char in enumerate(text):
+            if index:
+                sleep(pause)
+            self.execute_pipeline(key_events(char))
+
+    # Navigation
+
+    @property
+    def current_url(self):
+        return self.execute_script('return window.location.href;')
+
+    @property
+    def title(self):
+        return self.execute_script('return document.title;')
+
+    def get(self, url):
+        self._navigate('Page.navigate', {'url': url})
+
+    def refresh(self):
+        self._navigate('Page.reload', {})
+
+    def _navigate(self, method, params):
+        """ Send navigation command and wait for load event of the new document """
+        loaded = threading.Event()
+        session_id = self.session_id
+
+        def on_load(_, event_session_id):
+            if event_session_id == session_id:
+                loaded.set()
+
+        self.connection.on('Page.loadEventFired', on_load)
+        try:
+            response = self.execute(method, params)
+            if response.get('errorText'):
+                raise WebDriverException(f'Navigation to {params.get("url")} failed: {response["errorText"]}')
+            same_document = method == 'Page.navigate' and not response.get('loaderId')  # fragment: no load event
+            if not same_document and not loaded.wait(self.connection.timeout):
+                raise WebDriverException(f'Page not loaded in {self.connection.timeout}s')
+        finally:
+            self.connection.off('Page.loadEventFired', on_load)
+
+    # Tabs
+
+    def _on_target_created(self, params, _):
+        target = params['targetInfo']
+        if target['type'] == 'page':
+            with self.targets_changed:
+                if target['targetId'] not in self.targets:
+                    self.targets.append(target['targetId'])
+                self.targets_changed.notify_all()
+
+    def _on_target_destroyed(self, params, _):
+        with self.targets_changed:
+            if params['targetId'] in self.targets:
+                self.targets.remove(params['targetId'])
+            self.sessions.pop(params['targetId'], None)
+            self.targets_changed.notify_all()
+
+    @property
+    def window_handles(self):
+        """ Tab ids in order of opening. Tracked by target events, no browser round trip """
+        with self.targets_changed:
+            return list(self.targets)
+
+    @property
+    def current_window_handle(self):
+        return self.target_id
+
+    def switch_to_target(self, target_id):
+        if target_id not in self.window_handles:
+            raise NoSuchWindowException(f'No tab {target_id}')
+        if target_id not in self.sessions:
+            session_id = self.connection.execute(
+                'Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+            commands = [('Page.enable', {}), ('Runtime.enable', {})] + [
+                ('Page.addScriptToEvaluateOnNewDocument', script) for script in self.new_document_scripts]
+            self.connection.pipeline(commands, session_id)
+            self.sessions[target_id] = session_id
+        self.connection.execute('Target.activateTarget', {'targetId': target_id})
+        self.target_id, self.session_id = target_id, self.sessions[target_id]
+
+    def close(self):
+        """ Close the current tab """
+        self.connection.execute('Target.closeTarget', {'targetId': self.target_id})
+        self.target_id = self.session_id = None
+
+    # Browser state
+
+    def implicitly_wait(self, time_to_wait):
+        if time_to_wait:
+            raise WebDriverException('Implicit waits are not supported by DevTools backend')
+
+    def set_script_timeout(self, time_to_wait):
+        self.script_timeout = time_to_wait
+
+    def delete_all_cookies(self):
+        self.execute('Network.clearBrowserCookies')
+
+    def _window_id(self):
+        return self.connection.execute('Browser.getWindowForTarget', {'targetId': self.target_id})['windowId']
+
+    def set_window_size(self, width, height):
+        self.connection.execute('Browser.setWindowBounds', {
+            'windowId': self._window_id(), 'bounds': {'width': width, 'height': height, 'windowState': 'normal'}})
+
+    def set_window_position(self, x, y):
+        self.connection.execute('Browser.setWindowBounds', {
+            'windowId': self._window_id(), 'bounds': {'left': x, 'top': y, 'windowState': 'normal'}})
+
+    def get_screenshot_as_png(self):
+        return base64.b64decode(self.execute('Page.captureScreenshot', {'format': 'png'})['data'])
+
+    @property
+    def log_types(self):
+        return []
+
+    def get_log(self, log_type):
+        return []
+
+    def quit(self):
+        try:
+            self.connection.execute('Browser.close', timeout=5)
+        except Exception:  # browser already closed
+            pass
+        self.connection.close()
+        if self.process:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
@@ -0,0 +1,128 @@
+import logging
+import threading
+
+from framework.events import SCRIPT_TIMEOUT
+from framework.utils import log
+from framework.web_driver import WebDriver
+
+
+class DriverPool:
+    """
+    Pool of warm browser sessions reused between tests.
+
+    Each xdist worker is a separate process, so a session-scoped pool is a per-worker pool.
+    Drivers are reset after each test and quit only when recycled or when the pool is closed.
+    """
+
+    def __init__(self, driver_factory, recycle_after=0, recycle_on_failure=True,
+                 window_size=(1200, 1200), window_position=(0, 0)):
+        """
+        :param driver_factory: callable without arguments that returns a new selenium driver
+        :param recycle_after: quit a driver after this count of tests. 0 - never recycle by count
+        :param recycle_on_failure: quit a driver after a failed test instead of resetting it
+        :param window_size: window size restored before each test
+        :param window_position: window position restored before each test
+        """
+        self.driver_factory = driver_factory
+        self.recycle_after = recycle_after
+        self.recycle_on_failure = recycle_on_failure
+        self.window_size = window_size
+        self.window_position = window_position
+
+        self._idle = []
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Get warm driver from the pool or start a new one
+
+        :return: WebDriver object bound as the current driver
+        """
+        with self._lock:
+            driver = self._idle.pop() if self._idle else None
+
+        if driver is None:
+            log('Starting new browser session for the pool')
+            driver = self.driver_factory()
+            driver.implicitly_wait(0)  # all waits are explicit, see framework.waits
+            driver.set_script_timeout(SCRIPT_TIMEOUT)  # DOM event waits are async scripts, see framework.events
+            self._usage[id(driver)] = 0
+            self._prepare(driver)
+
+        self._usage[id(driver)] += 1
+        return WebDriver(driver=driver)
+
+    def release(self, web_driver, failed=False, keep_open=False):
+        """
+        Return driver into the pool after test
+
+        :param web_driver: WebDriver object from self.acquire()
+        :param failed: test failed with this driver
+        :param keep_open: detach driver from the pool without quitting (`no_teardown` marker)
+        :return: None
+        """
+        driver = web_driver.driver
+
+        if keep_open:
+            log('Browser session detached from the pool without teardown')
+            self._usage.pop(id(driver), None)
+            return
+
+        if self._should_recycle(driver, failed):
+            self._quit(driver)
+            return
+
+        try:
+            self.reset(driver)
+        except Exception as exception:
+            log('Browser session reset failed, recycling: {exception}', level=logging.WARNING, exception=exception)
+            self._quit(driver)
+            return
+
+        with self._lock:
+            self._idle.append(driver)
+
+    def reset(self, driver):
+        """
+        Return browser into the clean state: single blank tab, no cookies and storages, default window
+
+        :param driver: selenium driver
+        :return: None
+        """
+        handles = driver.window_handles
+        for handle in handles[1:]:  # extra tabs opened by WebDriver.switch_to_tab
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        if hasattr(driver, 'execute_cdp_cmd'):  # cookies of all domains, not only the current one
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        else:
+            driver.delete_all_cookies()
+        driver.execute_script('try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}')
+        driver.get('about:blank')
+        self._prepare(driver)
+
+    def close(self):
+        """ Quit all idle drivers """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for driver in idle:
+            self._quit(driver)
+
+    def _prepare(self, driver):
+        driver.set_window_size(*self.window_size)
+        driver.set_window_position(*self.window_position)
+
+    def _should_recycle(self, driver, failed):
+        if failed and self.recycle_on_failure:
+            return True
+        return bool(self.recycle_after) and self._usage.get(id(driver), 0) >= self.recycle_after
+
+    def _quit(self, driver):
+        self._usage.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as exception:
+            log('Browser session quit failed: {exception}', level=logging.WARNING, exception=exception)
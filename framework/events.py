@@ -0,0 +1,94 @@
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+from framework.tracer import tracer
+from framework.waits import WAIT_PROFILES, build_wait, wait_stats
+
+SCRIPT_TIMEOUT = 60  # seconds, async scripts finish by their own timeout, this one only guards the session
+
+# Resolves as soon as DOM condition is true: checked once and then on every DOM mutation, without polling.
+# Arguments: locator, is xpath, condition ('present' / 'absent' / 'count_changed'), baseline count, timeout ms
+DOM_CONDITION_SCRIPT = """
+const [locator, isXpath, condition, baseline, timeout] = arguments;
+const done = arguments[arguments.length - 1];
+const count = () => isXpath
+    ? document.evaluate(locator, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength
+    : document.querySelectorAll(locator).length;
+const isMet = current => condition === 'present' ? current > 0
+    : condition === 'absent' ? current === 0
+    : current !== baseline;
+const initial = count();
+if (isMet(initial)) return done({met: true, count: initial});
+
+let timer = null;
+const observer = new MutationObserver(() => {
+    const current = count();
+    if (isMet(current)) {
+        observer.disconnect();
+        clearTimeout(timer);
+        done({met: true, count: current});
+    }
+});
+observer.observe(document, {subtree: true, childList: true, attributes: true});
+timer = setTimeout(() => { observer.disconnect(); done({met: false, count: count()}); }, timeout);
+"""
+
+DOM_CONDITIONS = ('present', 'absent', 'count_changed')
+
+
+class DomEvents:
+    """ Waits for DOM conditions resolved by MutationObserver inside of the page: one driver command per wait """
+
+    def __init__(self, driver, timeout):
+        """
+        :param driver: selenium driver
+        :param timeout: default timeout in seconds
+        """
+        self.driver = driver
+        self.timeout = timeout
+
+    def wait(self, locator_type, locator, condition, baseline=None, timeout=None, message=''):
+        """
+        Wait until elements matching locator satisfy condition
+
+        :param locator_type: By.CSS_SELECTOR or By.XPATH
+        :param locator: element locator
+        :param condition: one of DOM_CONDITIONS
+        :param baseline: elements count to compare with for 'count_changed' condition
+        :param timeout: seconds. Default timeout if not given
+        :param message: timeout exception message
+        :return: elements count when condition is met
+        """
+        if condition not in DOM_CONDITIONS:
+            raise ValueError(f'Unknown DOM condition "{condition}", expected one of {DOM_CONDITIONS}')
+        timeout = self.timeout if timeout is None else timeout
+        args = (locator, locator_type == By.XPATH, condition, baseline, int(timeout * 1000))
+
+        if getattr(self.driver, 'shared_session', False):  # tab of TabGroup: async script would block other tabs
+            return self._poll(locator_type, locator, condition, baseline, timeout, message)
+
+        start_time = time.perf_counter()
+        try:
+            if tracer.enabled:
+                result = tracer.call('wait', f'dom {condition}', locator,
+                                     self.driver.execute_async_script, DOM_CONDITION_SCRIPT, *args)
+            else:
+                result = self.driver.execute_async_script(DOM_CONDITION_SCRIPT, *args)
+        finally:
+            wait_stats.record_wait(time.perf_counter() - start_time)
+
+        if not result['met']:
+            raise TimeoutException(f'{message or f"Elements are not {condition}"}. Locator: {locator}')
+        return result['count']
+
+    def _poll(self, locator_type, locator, condition, baseline, timeout, message):
+        """ Polling fallback of self.wait(): every check is a short command """
+        def count_if_met(driver):
+            count = len(driver.find_elements(by=locator_type, value=locator))
+            met = count > 0 if condition == 'present' else count == 0 if condition == 'absent' else count != baseline
+            return (count,) if met else False
+
+        wait = build_wait(self.driver, WAIT_PROFILES['fast']._replace(timeout=timeout))
+        return wait.until(count_if_met, message=f'{message or f"Elements are not {condition}"}. Locator: {locator}')[0]
@@ -0,0 +1,65 @@
+from functools import wraps
+
+from framework.web_driver import bound_driver
+
+# Page objects are created with the driver of their owner, so parts of a page opened in a tab use that tab
+
+
+class component:
+    """
+    Page object part (CookieFooter, Carousel, ...) created on first access and memoized per owner instance.
+    After the first access the instance attribute is returned without calling the descriptor
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        with bound_driver(instance.driver):
+            value = self.factory(instance)
+        instance.__dict__[self.name] = value
+        return value
+
+
+def _memoized_element(instance, key, factory):
+    elements = instance.__dict__.setdefault('_lazy_elements', {})
+    element = elements.get(key)
+    if element is None:
+        with bound_driver(instance.driver):
+            element = elements[key] = factory()
+    else:
+        element.cached_element = None  # located again on every access, as a new element would be
+    return element
+
+
+class locator:
+    """
+    WebElement property memoized per owner instance. Element is looked up anew on every access,
+    but WebElement object and its wait are created once
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return _memoized_element(instance, self.name, lambda: self.factory(instance))
+
+
+def parametrized_locator(method):
+    """ WebElement getter with arguments memoized per owner instance and arguments ~ row_by_id(7) """
+    name = method.__name__
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return _memoized_element(self, key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,141 @@
+import atexit
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import allure
+except ImportError:  # allure steps are optional
+    allure = None
+
+LOGGER_NAME = 'htfw'
+LOG_FORMAT = '[%(asctime)s][%(levelname)s]%(message)s'
+LOG_LEVEL = os.environ.get('HTFW_LOG_LEVEL', 'INFO')
+
+
+class LogEvent:
+    """
+    Structured log message: event template and fields. Formatted only when a handler needs the text
+
+    :param event: message template ~ 'Click into "{name}"'
+    :param fields: template fields ~ {'name': 'Search input'}
+    """
+    __slots__ = ('event', 'fields')
+
+    def __init__(self, event, fields):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self):
+        return self.event.format(**self.fields) if self.fields else self.event
+
+
+class DeferredQueueHandler(QueueHandler):
+    """ Queue handler that leaves formatting to the listener thread """
+
+    def prepare(self, record):
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """ One json object per line: time, level, worker, event template, fields and formatted message """
+
+    def format(self, record):
+        message = record.msg
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'worker': os.environ.get('PYTEST_XDIST_WORKER', 'main'),
+            'event': getattr(message, 'event', str(message)),
+            'message': record.getMessage(),
+        }
+        data.update(getattr(message, 'fields', None) or {})
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class AllureStepHandler(logging.Handler):
+    """ Every log event becomes a finished step in the allure tree of the current test """
+
+    def emit(self, record):
+        with allure.step(record.getMessage()):
+            pass
+
+
+class FrameworkLogger:
+    """ Framework logger: events are put into queue and written by a background listener thread """
+
+    def __init__(self, name=LOGGER_NAME):
+        self.logger = logging.getLogger(name)
+        self.logger.propagate = False
+        self.queue = queue.SimpleQueue()
+        self.handlers = []
+        self.listener = None
+        self.allure_handler = None
+
+    def setup(self, level=LOG_LEVEL, log_file=None, json_file=False, console=True):
+        """
+        (Re)configure outputs of the logger
+
+        :param level: level name or number ~ 'DEBUG'. Events below it are skipped before formatting
+        :param log_file: path of log file ~ per xdist worker
+        :param json_file: write structured json lines into log file instead of text
+        :param console: write text lines into stderr
+        :return: self object
+        """
+        self.stop()
+        self.handlers = []
+        if console:
+            self.handlers.append(logging.StreamHandler())
+        if log_file:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+        for handler in self.handlers:
+            is_json = json_file and isinstance(handler, logging.FileHandler)
+            handler.setFormatter(JsonFormatter() if is_json else logging.Formatter(LOG_FORMAT))
+
+        for handler in list(self.logger.handlers):
+            if handler is not self.allure_handler:
+                self.logger.removeHandler(handler)
+        self.logger.addHandler(DeferredQueueHandler(self.queue))
+        self.logger.setLevel(level)
+        self.listener = QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+        return self
+
+    def set_level(self, level):
+        self.logger.setLevel(level)
+
+    def route_to_allure(self, enabled=True):
+        """
+        Duplicate events into allure steps. Steps are created synchronously: allure step context is per test thread
+
+        :param enabled: add or remove allure handler
+        """
+        if enabled and allure is None:
+            raise Exception('Allure steps require "allure-pytest" package')
+        if enabled and self.allure_handler is None:
+            self.allure_handler = AllureStepHandler()
+            self.logger.addHandler(self.allure_handler)
+        elif not enabled and self.allure_handler is not None:
+            self.logger.removeHandler(self.allure_handler)
+            self.allure_handler = None
+
+    def log(self, level, event, fields):
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, LogEvent(event, fields))
+
+    def stop(self):
+        """ Write queued events and stop listener thread """
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        for handler in self.handlers:
+            handler.close()
+
+
+framework_logger = FrameworkLogger().setup()
+atexit.register(framework_logger.stop)
@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+
+from framework.tracer import traced
+from framework.utils import log
+from framework.waits import build_wait
+
+# Tracks XHR/fetch requests and DOM mutations of the document. Installed before page scripts through DevTools
+# `Page.addScriptToEvaluateOnNewDocument`, so requests sent while the page is loading are tracked too.
+NETWORK_TRACKER_SCRIPT = """
+(() => {
+    if (window.__htfwNetwork) return;
+    const state = {requests: [], lastMutation: Date.now()};
+    const track = (url) => {
+        const entry = {id: state.requests.length + 1, url: String(url), done: false};
+        state.requests.push(entry);
+        return entry;
+    };
+    state.status = (patterns, since) => {
+        const matches = entry => !patterns.length || patterns.some(pattern => entry.url.includes(pattern));
+        const tracked = state.requests.filter(matches);
+        return {
+            pending: tracked.filter(entry => !entry.done).length,
+            finished: tracked.filter(entry => entry.done && entry.id > since).length,
+            quiet: Date.now() - state.lastMutation,
+            last_id: state.requests.length,
+        };
+    };
+    window.__htfwNetwork = state;
+
+    const open = XMLHttpRequest.prototype.open;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.__htfwUrl = url;
+        return open.apply(this, arguments);
+    };
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        const entry = track(this.__htfwUrl);
+        this.addEventListener('loadend', () => { entry.done = true; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        const fetch = window.fetch;
+        window.fetch = function (resource) {
+            const entry = track(resource && resource.url ? resource.url : resource);
+            return fetch.apply(this, arguments).finally(() => { entry.done = true; });
+        };
+    }
+    new MutationObserver(() => { state.lastMutation = Date.now(); }).observe(
+        document, {subtree: true, childList: true, attributes: true, characterData: true});
+})();
+"""
+
+NETWORK_STATUS_SCRIPT = f'{NETWORK_TRACKER_SCRIPT}\nreturn window.__htfwNetwork.status(arguments[0], arguments[1]);'
+
+
+def install_network_tracker(driver):
+    """
+    Install network tracker into every new document of the browser session
+
+    :param driver: selenium driver
+    :return: given driver
+    """
+    if hasattr(driver, 'execute_cdp_cmd'):
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_SCRIPT})
+    return driver
+
+
+class NetworkWatcher:
+    """ Readiness waits based on in-flight requests and DOM mutations of the current document """
+
+    def __init__(self, driver, wait=None, quiet_time=0.2, settle_time=1.0):
+        """
+        :param driver: selenium driver
+        :param wait: explicit wait object, see framework.waits.build_wait
+        :param quiet_time: seconds without DOM mutations after requests finished
+        :param settle_time: seconds without DOM mutations to consider page ready when no request was sent
+        """
+        self.driver = driver
+        self.wait = wait if wait else build_wait(driver)
+        self.quiet_time = quiet_time
+        self.settle_time = settle_time
+
+    def status(self, patterns=(), since=0):
+        """
+        Network state of the current document. Tracker is injected if it's not installed yet
+
+        :param patterns: url parts of tracked requests. All requests if empty
+        :param since: count finished requests sent after this request id
+        :return: dict object ~ {'pending': 0, 'finished': 1, 'quiet': 250, 'last_id': 4}
+        """
+        return self.driver.execute_script(NETWORK_STATUS_SCRIPT, list(patterns), since)
+
+    def wait_idle(self, patterns=(), since=0):
+        """
+        Wait until tracked requests finished and DOM settled.
+        Page is considered ready when a tracked request sent after `since` finished and DOM is quiet for `quiet_time`,
+        or when nothing is pending and DOM is quiet for `settle_time`
+
+        :param patterns: url parts of tracked requests. All requests if empty
+        :param since: request id from self.status() taken before the action
+        :return: self object
+        """
+        def is_idle(_):
+            status = self.status(patterns, since)
+            quiet = status['quiet'] / 1000
+            if status['pending']:
+                return False
+            return quiet >= self.quiet_time if status['finished'] else quiet >= self.settle_time
+
+        self.wait.until(is_idle, message=f'Requests {list(patterns)} still pending or page still changing')
+        return self
+
+    @contextmanager
+    def expect_requests(self, patterns=()):
+        """
+        Wait for requests triggered by actions inside of the context
+
+        :param patterns: url parts of tracked requests. All requests if empty
+        """
+        since = self.status(patterns)['last_id']
+        yield self
+        self.wait_idle(patterns, since=since)
+
+
+class NetworkWaits:
+    """ Network waits for objects with `driver` and `wait` attributes (WebPage and WebElement) """
+    __slots__ = ()
+
+    @property
+    def network(self):
+        return NetworkWatcher(self.driver, wait=self.wait)
+
+    @traced()
+    def wait_network_idle(self, patterns=(), silent=False):
+        """
+        Wait until requests of the current document finished and DOM settled
+
+        :param patterns: url parts of tracked requests. All requests if empty
+        :param silent: skip logging
+        :return: self object
+        """
+        if not silent:
+            log('Wait until requests finished: {patterns}', patterns=list(patterns) or 'all')
+        self.network.wait_idle(patterns)
+        return self
+
+    @contextmanager
+    def expect_requests(self, patterns=(), silent=False):
+        """
+        Wait for requests triggered by actions inside of the context
+
+        :param patterns: url parts of tracked requests. All requests if empty
+        :param silent: skip logging
+        """
+        if not silent:
+            log('Wait for requests after action: {patterns}', patterns=list(patterns) or 'all')
+        with self.network.expect_requests(patterns):
+            yield self
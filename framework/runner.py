@@ -0,0 +1,104 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, NamedTuple, Optional
+
+from framework.tracer import tracer
+from framework.utils import log
+from framework.web_driver import WebDriver
+
+try:
+    import allure
+    from allure_commons.types import AttachmentType
+except ImportError:  # screenshots of failed scenarios are attached to allure report only
+    allure = None
+
+
+class ScenarioResult(NamedTuple):
+    name: str
+    duration: float
+    value: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def passed(self):
+        return self.error is None
+
+
+class ThreadRunner:
+    """
+    Runs independent UI scenarios concurrently on threads of one process, every thread with its own browser
+    from the driver pool. Page objects created inside of a scenario are bound to the driver of its thread
+    """
+
+    def __init__(self, pool, workers=4):
+        """
+        :param pool: DriverPool object, shared by all threads
+        :param workers: count of simultaneously driven browsers
+        """
+        self.pool = pool
+        self.workers = workers
+
+    @staticmethod
+    def _attach_screenshot(name, web_driver):
+        """ Screenshot of failed scenario, taken before its browser is released and quit """
+        if allure is None:
+            return
+        try:
+            allure.attach(web_driver.driver.get_screenshot_as_png(), name=f'screenshot_{name}',
+                          attachment_type=AttachmentType.PNG)
+        except Exception as exception:
+            log('Screenshot of failed scenario {name} failed: {exception}', level=logging.WARNING,
+                name=name, exception=exception)
+
+    def _run_scenario(self, name, scenario, trace=None):
+        with tracer.joined(trace, name):
+            web_driver = self.pool.acquire()  # binds driver to the current thread
+            start_time = time.perf_counter()
+            value, error = None, None
+            try:
+                value = scenario(web_driver)
+            except Exception as exception:
+                error = exception
+                self._attach_screenshot(name, web_driver)
+            finally:
+                self.pool.release(web_driver, failed=error is not None)
+                WebDriver.unbind()
+        return ScenarioResult(name, time.perf_counter() - start_time, value, error)
+
+    def run(self, scenarios):
+        """
+        Run scenarios and wait for all of them
+
+        :param scenarios: dict object {name: callable(WebDriver)}
+        :return: list of ScenarioResult objects in order of scenarios
+        """
+        log('Run {count} scenarios on {workers} threads', count=len(scenarios), workers=self.workers)
+        trace = tracer.fork()  # scenario threads are traced into the trace of the test
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='htfw-scenario') as executor:
+            futures = [executor.submit(self._run_scenario, name, scenario, trace)
+                       for name, scenario in scenarios.items()]
+            return [future.result() for future in futures]
+
+    def map(self, scenario, params):
+        """
+        Run one scenario with different params
+
+        :param scenario: callable(WebDriver, param)
+        :param params: iterable of params, `str(param)` is a name of scenario result
+        :return: list of ScenarioResult objects in order of params
+        """
+        return self.run({str(param): lambda web_driver, param=param: scenario(web_driver, param) for param in params})
+
+    @staticmethod
+    def raise_failures(results):
+        """
+        Raise AssertionError with all failed scenarios
+
+        :param results: list of ScenarioResult objects
+        :return: list of scenario values
+        """
+        failures = [f'{result.name}: {result.error!r}' for result in results if not result.passed]
+        if failures:
+            raise AssertionError('Failed scenarios:\n' + '\n'.join(failures))
+        return [result.value for result in results]
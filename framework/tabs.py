@@ -0,0 +1,174 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from framework.network import install_network_tracker
+from framework.runner import ScenarioResult, ThreadRunner
+from framework.tracer import tracer
+from framework.utils import log
+from framework.web_driver import WebDriver, bound_driver
+
+
+class TabDriver:
+    """
+    Driver bound to one tab of a shared browser session. Every command switches the session to the tab first
+    (only when another tab is active) and holds the group lock, so tabs can be driven from several threads.
+    Elements found by this driver send their commands through it too
+    """
+    shared_session = True  # long blocking commands (async scripts) would stall other tabs, see framework.events
+
+    def __init__(self, group, handle):
+        """
+        :param group: TabGroup object
+        :param handle: window handle of the tab
+        """
+        self.group = group
+        self.handle = handle
+
+    def execute(self, driver_command, params=None):
+        with self.group.lock:
+            self.group.activate(self.handle)
+            return self.group.driver.execute(driver_command, params)
+
+    def _adopt(self, element):
+        element._parent = self  # element commands of both backends go through this tab driver
+        return element
+
+    def find_element(self, by='id', value=None):
+        with self.group.lock:
+            self.group.activate(self.handle)
+            return self._adopt(self.group.driver.find_element(by=by, value=value))
+
+    def find_elements(self, by='id', value=None):
+        with self.group.lock:
+            self.group.activate(self.handle)
+            return [self._adopt(element) for element in self.group.driver.find_elements(by=by, value=value)]
+
+    def get(self, url):
+        """ Navigate without waiting for load: other tabs stay available while the page is loading """
+        self.execute_script('window.location.href = arguments[0];', url)
+
+    def __getattr__(self, name):
+        with self.group.lock:
+            self.group.activate(self.handle)
+            attribute = getattr(self.group.driver, name)
+        if not callable(attribute):
+            return attribute
+
+        def in_tab(*args, **kwargs):
+            with self.group.lock:
+                self.group.activate(self.handle)
+                return attribute(*args, **kwargs)
+
+        return in_tab
+
+
+class TabGroup:
+    """
+    Several tabs of one browser session. Page objects created while a tab is bound use that tab,
+    so independent checks share one browser and their page loads overlap
+    """
+    raise_failures = staticmethod(ThreadRunner.raise_failures)  # results of self.run()
+
+    def __init__(self, web_driver):
+        """
+        :param web_driver: WebDriver object which session is shared by tabs
+        """
+        self.web_driver = web_driver
+        self.driver = web_driver.driver
+        self.lock = threading.RLock()
+        self.active = self.driver.current_window_handle
+        self.tabs = []
+
+    def activate(self, handle):
+        """ Switch session to the tab if it's not active. Called under self.lock """
+        if self.active != handle:
+            self.driver.switch_to.window(handle)
+            self.active = handle
+
+    def open(self, count):
+        """
+        Open tabs. The first tab reuses the current window
+
+        :param count: count of tabs
+        :return: list of TabDriver objects
+        """
+        log('Open {count} tabs in one browser', count=count)
+        with self.lock:
+            if not self.tabs:
+                self.tabs.append(TabDriver(self, self.active))
+            while len(self.tabs) < count:
+                self.driver.switch_to.new_window('tab')
+                self.active = self.driver.current_window_handle
+                if not hasattr(self.driver, 'new_document_scripts'):  # DevTools backend applies them to new tabs
+                    install_network_tracker(self.driver)  # chromedriver installs init scripts per tab
+                self.tabs.append(TabDriver(self, self.active))
+        return self.tabs[:count]
+
+    @contextmanager
+    def bound(self, tab):
+        """
+        Bind page objects created inside of the context to the tab
+
+        :param tab: TabDriver object
+        """
+        with bound_driver(tab):
+            yield tab
+
+    def open_pages(self, page_class, urls):
+        """
+        Open a page in every tab: all navigations are started before waiting, so page loads overlap
+
+        :param page_class: WebPage subclass without constructor arguments ~ LeaderboardPage
+        :param urls: list of urls, one per tab
+        :return: list of tuple(TabDriver, loaded page object)
+        """
+        tabs = self.open(len(urls))
+        for tab, url in zip(tabs, urls):
+            log('Navigating tab to url {url}', url=url)
+            tab.get(url)
+
+        pages = []
+        for tab in tabs:
+            with self.bound(tab):
+                pages.append((tab, page_class().wait_page_loaded()))
+        return pages
+
+    def run(self, scenario, params):
+        """
+        Run scenario in every tab concurrently: one thread per tab, commands of tabs are interleaved
+
+        :param scenario: callable(TabDriver, param). Page objects created inside use its tab
+        :param params: list of params, one tab per param
+        :return: list of ScenarioResult objects in order of params
+        """
+        def run_in_tab(tab, param):
+            start_time = time.perf_counter()
+            WebDriver.driver = tab  # binding of the executor thread
+            try:
+                with tracer.joined(trace, str(param)):
+                    value = scenario(tab, param)
+                return ScenarioResult(str(param), time.perf_counter() - start_time, value)
+            except Exception as exception:
+                return ScenarioResult(str(param), time.perf_counter() - start_time, error=exception)
+            finally:
+                WebDriver.unbind()
+
+        trace = tracer.fork()  # tab threads are traced into the trace of the test
+        tabs = self.open(len(params))
+        with ThreadPoolExecutor(max_workers=len(tabs), thread_name_prefix='htfw-tab') as executor:
+            futures = [executor.submit(run_in_tab, tab, param) for tab, param in zip(tabs, params)]
+            return [future.result() for future in futures]
+
+    def close(self):
+        """ Close opened tabs and return session to the first one """
+        with self.lock:
+            for tab in self.tabs[1:]:
+                self.activate(tab.handle)
+                self.driver.close()
+            if self.tabs:
+                self.driver.switch_to.window(self.tabs[0].handle)
+                self.active = self.tabs[0].handle
+            self.tabs = []
+        WebDriver.driver = self.driver
@@ -0,0 +1,218 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+
+# Span kinds: `step` - framework call (WebElement/WebPage/WebDriver method), `wait` - explicit wait,
+# `command` - chromedriver command, `sleep` - time.sleep inside framework
+SPAN_KINDS = ('step', 'wait', 'command', 'sleep')
+
+
+class Span:
+    __slots__ = ('kind', 'name', 'target', 'start', 'duration', 'depth', 'children_time')
+
+    def __init__(self, kind, name, target, start, depth):
+        self.kind = kind
+        self.name = name
+        self.target = target
+        self.start = start
+        self.duration = 0.0
+        self.depth = depth
+        self.children_time = 0.0
+
+    @property
+    def self_time(self):
+        """ Duration without nested spans """
+        return self.duration - self.children_time
+
+    def as_dict(self):
+        return {'kind': self.kind, 'name': self.name, 'target': self.target, 'start': round(self.start, 6),
+                'duration': round(self.duration, 6), 'depth': self.depth}
+
+
+class Tracer(threading.local):
+    """
+    Per-test trace of framework calls. Disabled tracer adds a single attribute check per call.
+    State is per thread: tests running on threads of one process are traced separately,
+    scenario threads of a test join its trace by fork() and joined()
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.name = None
+        self.spans = []
+        self.stack = []
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def start(self, name):
+        """
+        Start a new trace
+
+        :param name: trace name ~ test node id
+        """
+        self.name, self.spans, self.stack = name, [], []
+        self.started_at = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        """
+        Stop tracing
+
+        :return: self object
+        """
+        self.enabled = False
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def fork(self):
+        """
+        Trace of the current thread to be continued by worker threads, see self.joined()
+
+        :return: tuple(trace name, start time, spans list) or None when tracing is disabled
+        """
+        return (self.name, self.started_at, self.spans) if self.enabled else None
+
+    @contextmanager
+    def joined(self, fork, name):
+        """
+        Trace the current worker thread into the forked trace. Spans are on the time axis of the forked trace
+        and one level deeper, so time of parallel threads is not counted as time of the test thread
+
+        :param fork: result of fork() in the test thread. Nothing is traced when None
+        :param name: name of the worker ~ scenario name
+        """
+        if fork is None:
+            yield self
+            return
+
+        trace_name, started_at, spans = fork
+        self.start(f'{trace_name} [{name}]')
+        self.started_at = started_at
+        self.stack = [Span('step', name, '', time.perf_counter() - started_at, 0)]
+        try:
+            yield self
+        finally:
+            self.stop()
+            spans.extend(self.spans)
+
+    def call(self, kind, name, target, function, *args, **kwargs):
+        """ Call function inside of a new span """
+        span = Span(kind, name, target, time.perf_counter() - self.started_at, len(self.stack))
+        self.stack.append(span)
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            span.duration = time.perf_counter() - start_time
+            self.stack.pop()
+            if self.stack:
+                self.stack[-1].children_time += span.duration
+            self.spans.append(span)
+
+    def summary(self, top=10):
+        """
+        Text summary: time by span kind, slowest commands and steps
+
+        :param top: count of slowest items in lists
+        :return: list of strings
+        """
+        kinds = {kind: [0, 0.0] for kind in SPAN_KINDS}
+        commands = defaultdict(lambda: [0, 0.0])
+        traced_time = 0.0
+        for span in self.spans:
+            kinds[span.kind][0] += 1
+            kinds[span.kind][1] += span.self_time
+            if span.depth == 0:
+                traced_time += span.duration
+            if span.kind == 'command':
+                commands[span.name][0] += 1
+                commands[span.name][1] += span.duration
+
+        lines = [f'Trace of {self.name}: {self.duration:.2f}s', f'{"kind":<10}{"count":>8}{"self time":>12}']
+        for kind, (count, self_time) in kinds.items():
+            lines.append(f'{kind:<10}{count:>8}{self_time:>11.2f}s')
+        lines.append(f'{"python":<10}{"":>8}{self.duration - traced_time:>11.2f}s  (outside of framework calls)')
+
+        lines.append('Slowest commands:')
+        for name, (count, duration) in sorted(commands.items(), key=lambda item: -item[1][1])[:top]:
+            lines.append(f'  {name}: {count} calls, {duration:.2f}s')
+        lines.append('Slowest steps:')
+        steps = sorted((span for span in self.spans if span.kind == 'step'), key=lambda span: -span.duration)
+        for span in steps[:top]:
+            lines.append(f'  {span.name} "{span.target}": {span.duration:.2f}s at {span.start:.2f}s')
+        return lines
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'duration': round(self.duration, 6),
+            'spans': [span.as_dict() for span in sorted(self.spans, key=lambda span: span.start)],
+        }
+
+    def dump(self, path):
+        """
+        Dump trace into json file for offline analysis
+
+        :param path: file path
+        """
+        with open(path, 'w', encoding='utf-8') as trace_file:
+            json.dump(self.as_dict(), trace_file, ensure_ascii=False)
+
+
+tracer = Tracer()
+
+
+def traced(kind='step'):
+    """
+    Decorator of framework methods. Span target is element/page name of `self`
+
+    :param kind: span kind from SPAN_KINDS
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not tracer.enabled:
+                return method(self, *args, **kwargs)
+            return tracer.call(kind, method.__name__, getattr(self, 'name', ''), method, self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def sleep(seconds):
+    """ time.sleep recorded into trace """
+    if not tracer.enabled:
+        return time.sleep(seconds)
+    return tracer.call('sleep', 'sleep', '', time.sleep, seconds)
+
+
+def instrument_driver(driver):
+    """
+    Record every chromedriver command of driver. Element commands are sent through driver.execute too
+
+    :param driver: selenium driver
+    :return: driver object
+    """
+    execute = driver.execute
+
+    def traced_execute(driver_command, params=None):
+        if not tracer.enabled:
+            return execute(driver_command, params)
+        return tracer.call('command', driver_command, '', execute, driver_command, params)
+
+    driver.execute = traced_execute
+
+    execute_pipeline = getattr(driver, 'execute_pipeline', None)  # DevTools backend: several commands at once
+    if execute_pipeline is not None:
+        def traced_pipeline(commands):
+            if not tracer.enabled:
+                return execute_pipeline(commands)
+            return tracer.call('command', f'pipeline[{len(commands)}]', commands[0][0] if commands else '',
+                               execute_pipeline, commands)
+
+        driver.execute_pipeline = traced_pipeline
+    return driver
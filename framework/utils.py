@@ -1,14 +1,27 @@
 import logging
 
+from framework.logger import framework_logger, LOG_FORMAT
 
-logging.basicConfig(
+logging.basicConfig(  # third party libraries, framework events are written by `framework_logger`
     level=logging.INFO,
-    format='[%(asctime)s][%(levelname)s]%(message)s',
+    format=LOG_FORMAT,
 )
 
 
-def log(msg):
-    return logging.info(msg)
+def log(event, level=logging.INFO, **fields):
+    """
+    Log framework event. Template is formatted with fields only if level is enabled
+
+    :param event: message or template ~ 'Click into "{name}"'
+    :param level: logging level
+    :param fields: template fields ~ name='Search input'
+    """
+    framework_logger.log(level, event, fields)
+
+
+def debug(event, **fields):
+    """ Log framework event with DEBUG level """
+    framework_logger.log(logging.DEBUG, event, fields)
 
 
 def cut_log_data(data: str, length=50) -> str:
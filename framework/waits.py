@@ -0,0 +1,167 @@
+import threading
+import time
+import weakref
+from typing import NamedTuple
+
+from selenium.webdriver.support.wait import WebDriverWait
+
+from framework.tracer import tracer
+
+
+class WaitProfile(NamedTuple):
+    """ Timeout and polling interval of explicit waits """
+    timeout: float
+    poll_frequency: float
+
+
+WAIT_PROFILES = {
+    'default': WaitProfile(timeout=10, poll_frequency=0.1),
+    'fast': WaitProfile(timeout=5, poll_frequency=0.05),
+    'slow': WaitProfile(timeout=30, poll_frequency=0.5),
+}
+
+
+class WaitSettings:
+    """ Wait profile used by elements and pages created without explicit profile """
+    profile = WAIT_PROFILES['default']
+
+
+def set_wait_profile(profile='default', timeout=None):
+    """
+    Set default wait profile for all new elements and pages
+
+    :param profile: profile name from WAIT_PROFILES or WaitProfile object
+    :param timeout: override timeout of selected profile
+    :return: WaitProfile object
+    """
+    profile = WAIT_PROFILES[profile] if isinstance(profile, str) else profile
+    if timeout is not None:
+        profile = profile._replace(timeout=timeout)
+    WaitSettings.profile = profile
+    return profile
+
+
+class WaitStats:
+    """ Time spent in explicit waits and presence checks of the current process """
+
+    def __init__(self):
+        self.waits_count = 0
+        self.waits_time = 0.0
+        self.checks_count = 0
+        self.checks_time = 0.0
+        self.absent_count = 0
+        self._lock = threading.Lock()
+
+    def record_wait(self, duration):
+        with self._lock:
+            self.waits_count += 1
+            self.waits_time += duration
+
+    def record_presence_check(self, duration, present):
+        with self._lock:
+            self.checks_count += 1
+            self.checks_time += duration
+            self.absent_count += 0 if present else 1
+
+    def as_dict(self):
+        return {
+            'waits_count': self.waits_count,
+            'waits_time': self.waits_time,
+            'checks_count': self.checks_count,
+            'checks_time': self.checks_time,
+            'absent_count': self.absent_count,
+        }
+
+    def merge(self, stats):
+        """
+        Merge stats of another process
+
+        :param stats: dict object from WaitStats.as_dict()
+        :return: self object
+        """
+        with self._lock:
+            for key, value in stats.items():
+                setattr(self, key, getattr(self, key) + value)
+        return self
+
+    def report(self, removed_implicit_wait=0):
+        """
+        Timing report lines
+
+        :param removed_implicit_wait: implicit wait (seconds) that absent element lookups used to block for
+        :return: list of strings
+        """
+        lines = [
+            f'Explicit waits: {self.waits_count} calls, {self.waits_time:.2f}s',
+            f'Presence checks: {self.checks_count} calls, {self.checks_time:.2f}s, {self.absent_count} absent',
+        ]
+        if removed_implicit_wait:
+            lines.append(f'Implicit wait removed: ~{self.absent_count * removed_implicit_wait:.2f}s '
+                         f'({self.absent_count} absent checks x {removed_implicit_wait}s)')
+        return lines
+
+
+wait_stats = WaitStats()
+
+
+class Wait(WebDriverWait):
+    """ WebDriverWait with time accounting into `wait_stats` """
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    def until(self, method, message=''):
+        start_time = time.perf_counter()
+        try:
+            if tracer.enabled:
+                return tracer.call('wait', 'until', message, super().until, method, message=message)
+            return super().until(method, message=message)
+        finally:
+            wait_stats.record_wait(time.perf_counter() - start_time)
+
+    def until_not(self, method, message=''):
+        start_time = time.perf_counter()
+        try:
+            if tracer.enabled:
+                return tracer.call('wait', 'until_not', message, super().until_not, method, message=message)
+            return super().until_not(method, message=message)
+        finally:
+            wait_stats.record_wait(time.perf_counter() - start_time)
+
+
+def build_wait(driver, profile=None):
+    """
+    Build explicit wait for given driver
+
+    :param driver: selenium driver
+    :param profile: WaitProfile object or profile name. Default profile from WaitSettings if not given
+    :return: Wait object
+    """
+    if profile is None:
+        profile = WaitSettings.profile
+    elif isinstance(profile, str):
+        profile = WAIT_PROFILES[profile]
+    return Wait(driver, profile.timeout, poll_frequency=profile.poll_frequency)
+
+
+_shared_waits = weakref.WeakValueDictionary()  # alive while used by some element
+
+
+def shared_wait(driver, profile=None):
+    """
+    Explicit wait shared by all elements of the driver with the same profile. Wait object keeps no per-call state
+
+    :param driver: selenium driver
+    :param profile: WaitProfile object or profile name. Default profile from WaitSettings if not given
+    :return: Wait object
+    """
+    if profile is None:
+        profile = WaitSettings.profile
+    elif isinstance(profile, str):
+        profile = WAIT_PROFILES[profile]
+    key = (id(driver), profile)
+    wait = _shared_waits.get(key)
+    if wait is None or wait._driver is not driver:  # id of a collected driver can be reused
+        wait = _shared_waits[key] = build_wait(driver, profile)
+    return wait
@@ -1,37 +1,85 @@
-import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 
-from framework.utils import log
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
 
+from framework.tracer import traced
+from framework.utils import log, debug
+from framework.waits import WAIT_PROFILES, build_wait
 
-class WebDriver:
-    driver = None
+
+# Driver of the current thread or asyncio task. New threads start unbound, `asyncio.to_thread` inherits the binding
+_current_driver = ContextVar('htfw_driver', default=None)
+
+
+class DriverBinding(type):
+    """ `WebDriver.driver` is a context-local binding: elements and pages created in a thread use its driver """
+
+    @property
+    def driver(cls):
+        return _current_driver.get()
+
+    @driver.setter
+    def driver(cls, driver):
+        _current_driver.set(driver)
+
+
+@contextmanager
+def bound_driver(driver):
+    """
+    Bind driver to page objects created inside of the context, previous binding is restored on exit
+
+    :param driver: selenium driver or TabDriver
+    """
+    token = _current_driver.set(driver)
+    try:
+        yield driver
+    finally:
+        _current_driver.reset(token)
+
+
+class WebDriver(metaclass=DriverBinding):
 
     def __init__(self, driver):
         self.driver = driver
         WebDriver.driver = self.driver
 
+    @staticmethod
+    def unbind():
+        """ Remove driver binding of the current thread or task """
+        _current_driver.set(None)
+
     @property
     def current_url(self):
-        log('Getting current url')
+        debug('Getting current url')
         return self.driver.current_url
 
     @property
     def window_handles(self):
         return self.driver.window_handles
 
+    @traced()
     def switch_to_tab(self, tab_id=1, wait=True, timeout=10):
-        expected_windows_count = tab_id + 1
-        log(f'Switch to tab {expected_windows_count}')
+        """
+        Switch to browser tab. Opening of the tab is awaited by explicit wait on windows count
 
-        def is_tab_opened():
-            return len(self.window_handles) == expected_windows_count
+        :param tab_id: index of the tab
+        :param wait: wait until tab is opened
+        :param timeout: seconds
+        """
+        expected_windows_count = tab_id + 1
+        log('Switch to tab {tab}', tab=expected_windows_count)
 
         if wait:
-            start_time = time.time()
-            while timeout > (time.time() - start_time) and not is_tab_opened():
-                time.sleep(0.05)
+            try:
+                build_wait(self.driver, WAIT_PROFILES['fast']._replace(timeout=timeout)).until(
+                    EC.number_of_windows_to_be(expected_windows_count))
+            except TimeoutException:
+                pass
 
-        if not is_tab_opened():
+        window_handles = self.window_handles
+        if len(window_handles) != expected_windows_count:
             raise Exception(f'Tab {expected_windows_count} not opened')
 
-        self.driver.switch_to.window(self.window_handles[tab_id])
+        self.driver.switch_to.window(window_handles[tab_id])
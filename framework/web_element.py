@@ -1,15 +1,30 @@
 import time
 
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+)
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.wait import WebDriverWait
 
-from framework.utils import log, cut_log_data
+from framework.events import DomEvents
+from framework.network import NetworkWaits
+from framework.tracer import traced
+from framework.utils import log, debug, cut_log_data
+from framework.waits import shared_wait, wait_stats
 from framework.web_driver import WebDriver
 
+# Element is not ready for interaction yet, action should be retried until wait timeout
+NOT_INTERACTABLE_EXCEPTIONS = (ElementClickInterceptedException, ElementNotInteractableException)
 
-class WebElement:
-    def __init__(self, locator=None, name=None, locator_type=None):
+
+class WebElement(NetworkWaits):
+    __slots__ = ('locator', 'name', 'locator_type', 'driver', 'wait', 'cached_element')
+
+    def __init__(self, locator=None, name=None, locator_type=None, wait_profile=None):
         self.locator = locator
         self.name = locator if not name else name
         if not locator_type:
@@ -18,114 +33,253 @@ class WebElement:
             self.locator_type = locator_type
 
         self.driver = WebDriver.driver
-        self.wait = WebDriverWait(self.driver, 10)
+        self.wait = shared_wait(self.driver, wait_profile)
+        self.cached_element = None
+
+    @property
+    def dom_events(self):
+        return DomEvents(self.driver, self.wait.timeout)
 
     @property
     def element(self):
-        return self.driver.find_element(by=self.locator_type, value=self.locator)
+        """ Resolved element. Cached until it becomes stale """
+        if self.cached_element is None:
+            try:
+                self.cached_element = self.driver.find_element(by=self.locator_type, value=self.locator)
+            except NoSuchElementException:  # implicit waits are disabled, wait for presence explicitly
+                self.cached_element = self.wait.until(
+                    EC.presence_of_element_located((self.locator_type, self.locator)),
+                    message=f'Element "{self.name}" not found. Locator: {self.locator}')
+        return self.cached_element
 
     @property
     def all_elements(self):
         return self.driver.find_elements(by=self.locator_type, value=self.locator)
 
+    def _with_element(self, action):
+        """
+        Call action with cached element and repeat it once with a new lookup if element became stale
+
+        :param action: callable(selenium element)
+        :return: action result
+        """
+        try:
+            return action(self.element)
+        except StaleElementReferenceException:
+            self.cached_element = None
+            return action(self.element)
+
+    def _until(self, action, message):
+        """
+        Wait until action succeeds on element. Lookup is performed only when there is no cached element
+
+        :param action: callable(selenium element), returns falsy value if element is not ready yet
+        :param message: timeout exception message
+        :return: action result
+        """
+        def condition(driver):
+            if self.cached_element is None:
+                self.cached_element = driver.find_element(by=self.locator_type, value=self.locator)
+            try:
+                return action(self.cached_element)
+            except StaleElementReferenceException:
+                self.cached_element = None
+            except NOT_INTERACTABLE_EXCEPTIONS:
+                pass
+            return False
+
+        return self.wait.until(condition, message=f'{message}. Locator: {self.locator}')
+
     # Element waits
 
+    @traced()
     def wait_element_hidden(self, silent=False):
         if not silent:
-            log(f'Wait until hidden of "{self.name}"')
+            log('Wait until hidden of "{name}"', name=self.name)
         self.wait.until_not(EC.visibility_of_element_located((self.locator_type, self.locator)),
                             message=f'Element "{self.name}" still visible. Locator: {self.locator}')
         return self
 
+    @traced()
     def wait_element(self, silent=False):
         if not silent:
-            log(f'Wait until presence of "{self.name}"')
-        self.wait.until(EC.visibility_of_element_located((self.locator_type, self.locator)),
-                        message=f'Not waited for element "{self.name}". Locator: {self.locator}')
+            log('Wait until presence of "{name}"', name=self.name)
+        self._until(lambda element: element.is_displayed(), message=f'Not waited for element "{self.name}"')
+        return self
+
+    @traced()
+    def wait_removed(self, timeout=None, silent=False):
+        """
+        Wait until element is removed from DOM. Resolved by DOM mutation event, without polling
+
+        :param timeout: seconds. Wait profile timeout if not given
+        :param silent: skip logging
+        :return: self object
+        """
+        if not silent:
+            log('Wait until removed "{name}"', name=self.name)
+        self.dom_events.wait(self.locator_type, self.locator, 'absent', timeout=timeout,
+                             message=f'Element "{self.name}" still present')
+        self.cached_element = None
         return self
 
+    @traced()
+    def wait_count_changed(self, count, timeout=None, silent=False):
+        """
+        Wait until count of matching elements differs from given one. Resolved by DOM mutation event, without polling
+
+        :param count: count of elements before an action
+        :param timeout: seconds. Wait profile timeout if not given
+        :param silent: skip logging
+        :return: new count of elements
+        """
+        if not silent:
+            log('Wait until count of "{name}" changed from {count}', name=self.name, count=count)
+        return self.dom_events.wait(self.locator_type, self.locator, 'count_changed', baseline=count,
+                                    timeout=timeout, message=f'Count of "{self.name}" still {count}')
+
+    @traced()
     def wait_clickable(self, silent=False):
         if not silent:
-            log(f'Wait until clickable of "{self.name}"')
-        self.wait.until(EC.element_to_be_clickable((self.locator_type, self.locator)),
-                        message=f'Element "{self.name}" still not clickable. Locator: {self.locator}')
+            log('Wait until clickable of "{name}"', name=self.name)
+        self._until(lambda element: element.is_displayed() and element.is_enabled(),
+                    message=f'Element "{self.name}" still not clickable')
         return self
 
     # Element interaction
 
+    @traced()
     def click(self):
-        log(f'Click into "{self.name}"')
-        self.wait_element(silent=True).wait_clickable(silent=True).element.click()
+        log('Click into "{name}"', name=self.name)
+        self._until(lambda element: element.click() or True, message=f'Element "{self.name}" still not clickable')
         return self
 
+    @traced()
     def type_text(self, text, wait=True, silent=False):
         if wait:
             self.wait_element(silent=True)
         if not silent:
-            log(f'Type text {cut_log_data(text)} into "{self.name}"')
-        self.element.send_keys(text)
+            log('Type text {text} into "{name}"', text=cut_log_data(text), name=self.name)
+        self._with_element(lambda element: element.send_keys(text))
         return self
 
+    @traced()
     def type_slowly(self, text, sleep_gap=0.05, wait=True, silent=False):
+        """
+        Type text letter by letter with pauses, e.g. for inputs with debounced handlers.
+        Pauses are performed by the browser: whole text is typed by a single actions command
+
+        :param text: text to type
+        :param sleep_gap: pause between letters in seconds
+        :param wait: wait element before interaction
+        :param silent: skip logging
+        :return: self object
+        """
         if wait:
             self.wait_element(silent=True)
         if not silent:
-            log(f'Type text "{cut_log_data(text)}" into "{self.name}"')
-        for letter in str(text):
-            self.element.send_keys(letter)
-            time.sleep(sleep_gap)
+            log('Type text "{text}" into "{name}"', text=cut_log_data(str(text)), name=self.name)
+        text = str(text)
+        if not text:
+            return self
+
+        def type_letters(element):
+            type_with_pauses = getattr(self.driver, 'type_with_pauses', None)  # DevTools backend, see framework.cdp
+            if type_with_pauses is not None:
+                return type_with_pauses(element, text, sleep_gap)
+            actions = ActionChains(self.driver, duration=0).send_keys_to_element(element, text[0])
+            for letter in text[1:]:
+                actions.pause(sleep_gap).send_keys(letter)
+            actions.perform()
+
+        self._with_element(type_letters)
         return self
 
+    @traced()
     def clear_text(self, wait=True, silent=False):
         if wait:
             self.wait_element(silent=True)
         if not silent:
-            log(f'Clear text in "{self.name}"')
-        self.element.clear()
+            log('Clear text in "{name}"', name=self.name)
+        self._with_element(lambda element: element.clear())
         return self
 
     # Element state
 
+    @traced()
     def is_displayed(self, silent=False):
         if not silent:
-            log(f'Check visibility of "{self.name}"')
-        return self.element.is_displayed()
+            debug('Check visibility of "{name}"', name=self.name)
+        return self._with_element(lambda element: element.is_displayed())
 
+    @traced()
+    def is_present(self, silent=False):
+        """ Non-blocking check of element presence in DOM """
+        if not silent:
+            debug('Check presence of "{name}"', name=self.name)
+        start_time = time.perf_counter()
+        present = len(self.all_elements) > 0
+        wait_stats.record_presence_check(time.perf_counter() - start_time, present)
+        return present
+
+    @traced()
     def is_available(self, silent=False):
         if not silent:
-            log(f'Check accessibility of "{self.name}"')
-        return True if len(self.all_elements) > 0 else False
+            debug('Check accessibility of "{name}"', name=self.name)
+        return self.is_present(silent=True)
 
+    @traced()
     def get_text(self, wait=True, silent=False):
         if wait:
             self.wait_element(silent=True)
         if not silent:
-            log(f'Get text from "{self.name}"')
-        return self.element.text
+            debug('Get text from "{name}"', name=self.name)
+        return self._with_element(lambda element: element.text)
 
+    @traced()
     def get_attribute(self, attribute, wait=True, silent=False):
         if wait:
             self.wait_element(silent=True)
         if not silent:
-            log(f'Get attribute from "{self.name}"')
-        return self.element.get_attribute(attribute)
+            debug('Get attribute {attribute} from "{name}"', attribute=attribute, name=self.name)
+        return self._with_element(lambda element: element.get_attribute(attribute))
 
+    @traced()
     def get_elements_texts(self, wait=True, silent=False):
         if wait:
             self.wait_element(silent=True)
         if not silent:
-            log(f'Get all texts from "{self.name}"')
+            debug('Get all texts from "{name}"', name=self.name)
         return (element_item.text for element_item in self.all_elements)
 
+    @traced()
     def get_elements_count(self, wait=True, silent=False):
         if wait:
             self.wait_element(silent=True)
         if not silent:
-            log(f'Get elements count of "{self.name}"')
+            debug('Get elements count of "{name}"', name=self.name)
         return len(self.all_elements)
 
+    @traced()
+    def execute_script(self, script, *args, wait=True, silent=False):
+        """
+        Execute script in the page context within a single driver command.
+
+        :param script: js code
+        :param args: script arguments
+        :param wait: wait element before interaction
+        :param silent: skip logging
+        :return: script result
+        """
+        if wait:
+            self.wait_element(silent=True)
+        if not silent:
+            log('Execute script for "{name}"', name=self.name)
+        return self.driver.execute_script(script, *args)
+
     # Element location
 
+    @traced()
     def scroll_to_viewport(self, block='center', wait=True):
         """
         Scroll to element.
@@ -136,5 +290,6 @@ class WebElement:
         """
         if wait:
             self.wait_element(silent=True)
-        self.driver.execute_script('arguments[0].scrollIntoView({{block: "{0}"}});'.format(block), self.element)
+        script = 'arguments[0].scrollIntoView({{block: "{0}"}});'.format(block)
+        self._with_element(lambda element: self.driver.execute_script(script, element))
         return self
@@ -1,31 +1,81 @@
-import logging
+from urllib.parse import urlsplit
 
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.wait import WebDriverWait
 
+from framework.network import NetworkWaits
+from framework.tracer import traced
+from framework.utils import log
+from framework.waits import shared_wait
 from framework.web_driver import WebDriver
 
 
-class WebPage:
+def document_url(url):
+    """
+    Url parts that identify loaded document: fragment is a route of single page app, trailing slash is ignored
 
-    def __init__(self, locator_type, locator, name):
+    :param url: page url ~ 'https://ru.wotblitz.com/ru/clans-leaderboard/#/leagues/1'
+    :return: tuple object ~ ('https', 'ru.wotblitz.com', '/ru/clans-leaderboard', '')
+    """
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc, parts.path.rstrip('/'), parts.query
+
+
+class WebPage(NetworkWaits):
+    route_requests = ()  # url parts of requests sent by the app on route switch. All requests if empty
+
+    def __init__(self, locator_type, locator, name, wait_profile=None):
         self.locator_type = locator_type
         self.locator = locator
         self.name = name
 
         self.driver = WebDriver.driver
-        self.wait = WebDriverWait(self.driver, 10)
+        self.wait = shared_wait(self.driver, wait_profile)
 
+    @traced()
     def wait_page_loaded(self, silent=False):
         if not silent:
-            logging.info(f'Wait presence of {self.name}')
+            log('Wait presence of {name}', name=self.name)
         self.wait.until(EC.visibility_of_element_located((self.locator_type, self.locator)))
         return self
 
-    def open_page(self, url='', silent=False):
+    @traced()
+    def open_page(self, url='', reload=False, silent=False):
+        """
+        Open page by url. When the browser is already on the same document and only the route (url fragment)
+        differs, route is switched inside of the app instead of full page load
+
+        :param url: page url. `self.url` if not given
+        :param reload: always load the whole page
+        :param silent: skip logging
+        :return: self object
+        """
         url = getattr(self, 'url', '') if not url else url
+        current_url = self.driver.current_url if urlsplit(url).fragment else ''
+        same_document = bool(current_url) and document_url(current_url) == document_url(url)
+        if same_document and not reload and urlsplit(current_url).fragment != urlsplit(url).fragment:
+            return self.switch_route(url, silent=silent)
+
         if not silent:
-            logging.info(f'Navigating to url {url}')
+            log('Navigating to url {url}', url=url)
         self.driver.get(url)
+        if same_document:  # navigation within the same document only changes fragment, reload it explicitly
+            self.driver.refresh()
         self.wait_page_loaded()
         return self
+
+    @traced()
+    def switch_route(self, url, silent=False):
+        """
+        Switch route of the loaded single page app by url fragment and wait until the app fetched route data
+
+        :param url: page url with route fragment ~ '.../clans-leaderboard/#/leagues/1'
+        :param silent: skip logging
+        :return: self object
+        """
+        fragment = urlsplit(url).fragment
+        if not silent:
+            log('Switch route to #{fragment}', fragment=fragment)
+        with self.expect_requests(self.route_requests, silent=True):
+            self.driver.execute_script('window.location.hash = arguments[0];', fragment)
+        self.wait_page_loaded(silent=True)
+        return self
@@ -8,6 +8,9 @@ RANKED_CLANS_COUNT = 32
 
 leaderboard_page_url = f'{BASE_URL}/ru/clans-leaderboard'
 
+# Api requests which page data depends on, used by network waits
+LEADERBOARD_REQUESTS = ('clans-leaderboard/tournamentCupX', 'clans-leaderboard/search')
+
 social_links = {
     'vk': 'https://vk.com/wotblitz',
     'instagram': 'https://www.instagram.com/wotblitz_official',
@@ -0,0 +1,303 @@
+/*
+ * Local replica of the clans leaderboard page. Markup keeps class names used by page objects,
+ * data is requested from the same origin api (recorded responses served by the stand-in server).
+ */
+(() => {
+    const API_ROOT = '/ru/api/';
+    const PAGE_SIZE = 8;
+    const ECHELONS = [
+        {type: 'platinum', title: 'Высший эшелон', start: 1, stop: 8},
+        {type: 'silver', title: 'Средний эшелон', start: 9, stop: 16},
+        {type: 'bronze', title: 'Нижний эшелон', start: 17, stop: 32},
+    ];
+    const SOCIAL_LINKS = [
+        'https://vk.com/wotblitz',
+        'https://www.instagram.com/wotblitz_official',
+        'https://discord.gg/VV8ggDm',
+        'https://www.youtube.com/channel/UCrh8Fd_QKmzhv4lhrS-k4sQ',
+        'https://www.facebook.com/wotblitz',
+        'https://ok.ru/wotblitz',
+    ];
+    const EMPTY_SEARCH_TEMPLATE = 'По вашему запросу ничего не найдено';
+    const TEAMS_PAGE_SIZE = 5;
+
+    const $ = (selector, root = document) => root.querySelector(selector);
+    const element = (tag, className, text) => {
+        const node = document.createElement(tag);
+        if (className) node.className = className;
+        if (text !== undefined) node.textContent = text;
+        return node;
+    };
+    const formatPoints = value => String(value).replace(/\B(?=(\d{3})+(?!\d))/g, ' ');
+    const formatEfficient = value => String(Math.round(value * 1000) / 10);
+    const api = path => fetch(`${API_ROOT}${path}`).then(response => response.json());
+
+    const state = {echelon: 0, page: 0, hasNext: false, loading: false, clans: [], request: 0};
+    const tableBody = () => $('.leaderboard-table tbody');
+
+    // Carousel
+
+    function renderCarousel() {
+        const wrapper = $('.swiper-wrapper');
+        wrapper.innerHTML = '';
+        ECHELONS.forEach((echelon, index) => {
+            const slide = element('div', 'swiper-slide');
+            if (index === state.echelon) slide.classList.add('swiper-slide-active');
+            if (index === state.echelon + 1) slide.classList.add('swiper-slide-next');
+            if (index === state.echelon - 1) slide.classList.add('swiper-slide-prev');
+            const medal = element('div', 'echelon-medal');
+            medal.setAttribute('style', `background-image: url("/stand-in/medals/${echelon.type}.svg")`);
+            slide.appendChild(medal);
+            slide.addEventListener('click', () => { window.location.hash = `#/leagues/${index}`; });
+            wrapper.appendChild(slide);
+        });
+        $('.leaderboard-carousel_title').textContent = ECHELONS[state.echelon].title;
+    }
+
+    // Leaderboard table
+
+    function setSpinner(visible) {
+        const body = tableBody();
+        const spinner = $('.leaderboard-table_loading', body);
+        if (visible && !spinner) {
+            const row = element('tr', 'leaderboard-table_loading');
+            const cell = element('td');
+            cell.colSpan = 4;
+            cell.appendChild(element('div', 'waiting_spinner'));
+            row.appendChild(cell);
+            body.appendChild(row);
+        } else if (!visible && spinner) {
+            spinner.remove();
+        }
+    }
+
+    function clanRow(clan) {
+        const row = element('tr', 'leaderboard-table_tr');
+        const place = element('td', 'leaderboard-table_place');
+        if (clan.rank <= 3) {
+            place.appendChild(element('span', `place place__${clan.rank}`));
+        } else {
+            place.textContent = clan.rank;
+        }
+        const participant = element('td', 'leaderboard-table_participant');
+        participant.appendChild(element('span', 'leaderboard-table_clan-tag', `[${clan.clan.tag}]`));
+        participant.appendChild(element('span', 'leaderboard-table_participant_name', clan.clan.name));
+        row.appendChild(place);
+        row.appendChild(participant);
+        row.appendChild(element('td', 'leaderboard-table_efficient', formatEfficient(clan.clan_efficient)));
+        row.appendChild(element('td', 'leaderboard-table_points', formatPoints(clan.rewards_count)));
+        row.addEventListener('click', () => openPopup(clan));
+        return row;
+    }
+
+    function loadPage() {
+        const echelon = ECHELONS[state.echelon];
+        const request = state.request;
+        state.loading = true;
+        state.page += 1;
+        setSpinner(true);
+        const query = `page=${state.page}&page_size=${PAGE_SIZE}&rank__gte=${echelon.start}&rank__lte=${echelon.stop}`;
+        return api(`clans-leaderboard/tournamentCupX/?${query}`).then(data => {
+            if (request !== state.request) return;  // echelon switched while loading
+            setSpinner(false);
+            const body = tableBody();
+            data.results.forEach(clan => {
+                state.clans.push(clan);
+                body.appendChild(clanRow(clan));
+            });
+            state.hasNext = Boolean(data.next);
+            state.loading = false;
+            loadNextPageIfVisible();
+        });
+    }
+
+    function loadNextPageIfVisible() {
+        const body = tableBody();
+        if (!body || !body.hasAttribute('infinite-scroll-disabled') || state.loading || !state.hasNext) return;
+        if (body.getBoundingClientRect().bottom < window.innerHeight + 100) loadPage();
+    }
+
+    function resetTable() {
+        const table = $('.leaderboard-table');
+        table.querySelectorAll('tbody').forEach(body => body.remove());
+        const body = element('tbody');
+        body.setAttribute('infinite-scroll-disabled', 'false');
+        table.appendChild(body);
+        $('.leaderboard-button-back').hidden = true;
+        state.page = 0;
+        state.clans = [];
+        state.hasNext = false;
+        state.request += 1;
+        return loadPage();
+    }
+
+    function showSearchResult(clan) {
+        const table = $('.leaderboard-table');
+        table.querySelectorAll('tbody').forEach(body => body.remove());
+        const body = element('tbody', 'leaderboard-table_search');
+        table.appendChild(body);
+        $('.leaderboard-button-back').hidden = false;
+        state.request += 1;
+        if (clan) body.appendChild(clanRow(clan));
+    }
+
+    // Echelon routing
+
+    function route() {
+        const match = window.location.hash.match(/^#\/leagues\/(\d+)/);
+        const echelon = match ? Math.min(Number(match[1]), ECHELONS.length - 1) : 0;
+        state.echelon = echelon;
+        renderCarousel();
+        resetTable();
+    }
+
+    // Search form
+
+    function renderSearchPopup(results) {
+        const popup = $('.search_popup');
+        popup.innerHTML = '';
+        if (!results.length) {
+            const result = element('div', 'search_result');
+            result.appendChild(element('p', 'search_result-text', EMPTY_SEARCH_TEMPLATE));
+            popup.appendChild(result);
+        }
+        results.forEach(clan => {
+            const item = element('button', 'search-list_item');
+            item.type = 'button';
+            item.appendChild(element('span', 'search-list_tag', `[${clan.tag}]`));
+            item.appendChild(element('span', 'search-list_name', clan.name));
+            item.addEventListener('click', () => selectSearchItem(clan));
+            popup.appendChild(item);
+        });
+        popup.hidden = false;
+    }
+
+    function selectSearchItem(clan) {
+        $('.search_popup').hidden = true;
+        $('.search_popup').innerHTML = '';
+        const query = `page=1&page_size=${ECHELONS[ECHELONS.length - 1].stop}&rank__gte=1`
+            + `&rank__lte=${ECHELONS[ECHELONS.length - 1].stop}`;
+        api(`clans-leaderboard/tournamentCupX/?${query}`).then(data => {
+            showSearchResult(data.results.find(ranked => ranked.clan.id === clan.id));
+        });
+    }
+
+    function setupSearch() {
+        const input = $('.search_input');
+        const clear = $('.search_clear');
+        let debounce = null;
+        input.addEventListener('input', () => {
+            clear.classList.toggle('search_clear__show', Boolean(input.value));
+            clearTimeout(debounce);
+            if (!input.value) {
+                $('.search_popup').hidden = true;
+                return;
+            }
+            debounce = setTimeout(() => {
+                const query = input.value;
+                api(`clans-leaderboard/search/?query=${encodeURIComponent(query).replace(/%20/g, '+')}`)
+                    .then(data => { if (input.value === query) renderSearchPopup(data.results || []); });
+            }, 300);
+        });
+        clear.addEventListener('click', () => {
+            input.value = '';
+            clear.classList.remove('search_clear__show');
+            $('.search_popup').hidden = true;
+        });
+        $('.leaderboard-button-back').addEventListener('click', () => {
+            input.value = '';
+            clear.classList.remove('search_clear__show');
+            resetTable();
+        });
+    }
+
+    // Clan popup
+
+    function teamRow(team, tag) {
+        const row = element('tr', 'p-leaderboard-team');
+        if (!team.used) row.classList.add('p-leaderboard-team__uncounted');
+        const info = team.team || {tournament: {title: '—'}, title: '—'};
+        row.appendChild(element('td', 'p-leaderboard-team_title', info.tournament.title));
+        row.appendChild(element('td', 'p-leaderboard-team_participant_name', `[${tag}] ${info.title}`));
+        row.appendChild(element('td', 'p-leaderboard-team_te', formatEfficient(team.team_efficient)));
+        row.appendChild(element('td', 'p-leaderboard-team_cups', formatPoints(team.rewards)));
+        return row;
+    }
+
+    function openPopup(clan) {
+        const layer = $('.popup-layer');
+        layer.innerHTML = '';
+        const popup = element('div', 'popup');
+        const detail = element('div', 'p-leaderboard-detail');
+        const close = element('button', 'popup_button', '×');
+        close.type = 'button';
+        close.addEventListener('click', () => { layer.hidden = true; layer.innerHTML = ''; });
+        detail.appendChild(element('h2', 'p-leaderboard-detail_heading', `[${clan.clan.tag}] ${clan.clan.name}`));
+
+        const info = element('div', 'p-leaderboard-detail_info');
+        info.appendChild(element('span', 'p-leaderboard-detail_info-value', formatPoints(clan.rewards_count)));
+        info.appendChild(element('span', 'p-leaderboard-detail_info-value', formatEfficient(clan.clan_efficient)));
+        detail.appendChild(info);
+
+        const table = element('table', 'p-table_table');
+        const body = element('tbody');
+        table.appendChild(body);
+        detail.appendChild(table);
+        popup.appendChild(close);
+        popup.appendChild(detail);
+        layer.appendChild(popup);
+        layer.hidden = false;
+
+        api(`clans-leaderboard/tournamentCupX/${clan.clan.id}/`).then(data => {
+            const teams = data.teams || [];
+            let shown = 0;
+            const more = element('button', 'p-leaderboard-detail_button-more', 'Показать еще');
+            more.type = 'button';
+            const showMore = () => {
+                teams.slice(shown, shown + TEAMS_PAGE_SIZE).forEach(team => body.appendChild(teamRow(team, clan.clan.tag)));
+                shown += TEAMS_PAGE_SIZE;
+                if (shown >= teams.length) more.remove();
+            };
+            more.addEventListener('click', showMore);
+            detail.appendChild(more);
+            showMore();
+        });
+    }
+
+    // Seasons, cookies and social links
+
+    function setupSeasons() {
+        const menu = $('.season-select_menu');
+        $('.season-select_arrow').addEventListener('click', () => { menu.hidden = !menu.hidden; });
+        api('tournaments/seasons/').then(data => {
+            const seasons = data.results || [];
+            $('.season-select_current').textContent = seasons.length ? seasons[0].title : '';
+            seasons.forEach(season => menu.appendChild(element('button', 'season-select_item', season.title)));
+        });
+    }
+
+    function setupCookieFooter() {
+        const banner = $('#onetrust-banner-sdk');
+        const hide = () => { banner.style.display = 'none'; };
+        $('#onetrust-accept-btn-handler').addEventListener('click', hide);
+        $('.banner-close-button').addEventListener('click', hide);
+    }
+
+    function setupSocialLinks() {
+        const block = $('.social_content');
+        SOCIAL_LINKS.forEach(url => {
+            const link = element('a', 'social_link', new URL(url).hostname);
+            link.href = url;
+            link.target = '_blank';
+            block.appendChild(link);
+        });
+    }
+
+    setupSeasons();
+    setupCookieFooter();
+    setupSocialLinks();
+    setupSearch();
+    window.addEventListener('hashchange', route);
+    window.addEventListener('scroll', loadNextPageIfVisible);
+    route();
+})();
@@ -0,0 +1,57 @@
+from typing import Any, NamedTuple
+
+from src.page_object.pages.leaderboard_page import get_clan_info
+
+COMPARED_FIELDS = ('rank', 'title', 'efficient', 'points')
+
+
+class RowDiff(NamedTuple):
+    """ Mismatch of single field between api clan data and rendered table row """
+    rank: int
+    field: str
+    expected: Any
+    actual: Any
+
+
+def compare_table_with_api(api_clans, table_rows, page_start=1):
+    """
+    Compare every rendered table row with api clans data
+
+    :param api_clans: list of ClanRank objects from ModelApi.get_clans, ranks of one echelon
+    :param table_rows: list of TableRow objects from LeaderboardTable.snapshot
+    :param page_start: rank of the first row in the table
+    :return: list of RowDiff objects. Empty list if table is accurate to the api data
+    """
+    diffs = []
+    expected_clans = sorted((get_clan_info(clan_data) for clan_data in api_clans), key=lambda clan: clan['rank'])
+    expected_indexes = set()
+
+    for clan in expected_clans:
+        row_index = clan['rank'] - page_start
+        expected_indexes.add(row_index)
+        if not 0 <= row_index < len(table_rows):
+            diffs.append(RowDiff(clan['rank'], 'row', clan['title'], None))
+            continue
+
+        row = table_rows[row_index]
+        for field in COMPARED_FIELDS:
+            actual = getattr(row, field)
+            if actual != clan[field]:
+                diffs.append(RowDiff(clan['rank'], field, clan[field], actual))
+
+    for row_index, row in enumerate(table_rows):  # rendered rows without api data
+        if row_index not in expected_indexes:
+            diffs.append(RowDiff(row_index + page_start, 'row', None, row.title))
+
+    return diffs
+
+
+def format_diff(diffs):
+    """
+    Format row diffs for assertion message
+
+    :param diffs: list of RowDiff objects
+    :return: string object ~ 'rank 3, points: expected 44500, actual 44000'
+    """
+    return '\n'.join(f'rank {diff.rank}, {diff.field}: expected {diff.expected!r}, actual {diff.actual!r}'
+                     for diff in diffs)
@@ -1,6 +1,46 @@
 import time
+from typing import List, NamedTuple, Optional
 
+from framework.lazy import locator, parametrized_locator
 from framework.web_element import WebElement
+from selenium.common.exceptions import TimeoutException
+
+
+class TeamRow(NamedTuple):
+    """ Team reward row of the clan popup table """
+    tournament: str
+    title: str
+    efficient: Optional[float]
+    points: Optional[int]
+    counted: bool
+
+
+class PopupSnapshot(NamedTuple):
+    """ Clan popup header info with all loaded team rows """
+    name: str
+    efficient: float
+    points: int
+    teams: List[TeamRow]
+
+
+POPUP_SNAPSHOT_SCRIPT = """
+const text = (root, selector) => {
+    const node = root.querySelector(selector);
+    return node ? node.innerText.replace(/\\u00a0/g, ' ').trim() : '';
+};
+return {
+    name: text(document, arguments[0]),
+    header_items: Array.from(document.querySelectorAll(arguments[1])).map(
+        node => node.innerText.replace(/\\u00a0/g, ' ').trim()),
+    teams: Array.from(document.querySelectorAll(arguments[2])).map(row => ({
+        tournament: text(row, '[class *= title]'),
+        title: text(row, '[class *= participant_name]'),
+        efficient: text(row, '[class *= team_te]'),
+        points: text(row, '[class *= team_cups]'),
+        counted: !row.className.includes('uncounted'),
+    })),
+};
+"""
 
 
 class ClanPopup(WebElement):
@@ -11,48 +51,52 @@ class ClanPopup(WebElement):
 
     # Elements
 
-    @property
+    @locator
     def header(self):
         return WebElement('[class *= p-leaderboard-detail_heading]', name='popup header (clan name)')
 
-    @property
+    @locator
     def header_items(self):
         return WebElement('[class *= info-value]', name='header items')
 
-    @property
+    @locator
     def close_button(self):
         return WebElement('button[class *= popup_button]', name='close popup button')
 
-    @property
+    @locator
     def expand_button(self):
         return WebElement('button[class *= button-more]', name='expand table button')
 
     # Table elements
 
-    @property
+    @locator
     def table(self):
         return WebElement('table[class *= p-table_table]', name='popup table')
 
-    @property
+    @locator
     def all_rows(self):
         return WebElement(self.table_row_locator, name='table row')
 
-    @property
+    @locator
     def all_rows_except_uncounted(self):
         return WebElement(f'{self.table_row_locator}:not([class *= uncounted])', name='table row except uncounted')
 
+    @parametrized_locator
     def tournament_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= title]',
                           name=f'team tournament by row id: {row_id}')
 
+    @parametrized_locator
     def title_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= participant_name]',
                           name=f'team title by row id: {row_id}')
 
+    @parametrized_locator
     def efficient_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= team_te]',
                           name=f'team efficient by row id: {row_id}')
 
+    @parametrized_locator
     def points_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= team_cups]',
                           name=f'team points by row id: {row_id}')
@@ -82,15 +126,47 @@ class ClanPopup(WebElement):
     def get_team_points_by_row_id(self, row_id):
         return int(self.points_by_id(row_id).get_text().replace(' ', ''))
 
+    def snapshot(self):
+        """
+        Get popup header info and all loaded team rows by single script execution
+
+        :return: PopupSnapshot object ~ PopupSnapshot(name='[TAG] Clan Name', efficient=89.2, points=44500, teams=[...])
+        """
+        data = self.execute_script(POPUP_SNAPSHOT_SCRIPT, self.header.locator, self.header_items.locator,
+                                   self.table_row_locator)
+        points, efficient = data['header_items'][:2]
+        return PopupSnapshot(
+            name=data['name'],
+            efficient=float(efficient),
+            points=int(points.replace(' ', '')),
+            teams=[
+                TeamRow(
+                    tournament=team['tournament'],
+                    title=team['title'],
+                    efficient=float(team['efficient']) if team['efficient'] else None,
+                    points=int(team['points'].replace(' ', '')) if team['points'] else None,
+                    counted=team['counted'],
+                )
+                for team in data['teams']
+            ],
+        )
+
     def expand_rewards(self, timeout=10):
         """
         Trying to expand all rewards by 'see moore' button.
+        After every click rows are awaited by DOM mutation event instead of repeated clicking
 
         :param timeout: timeout to stop trying to expand rewards
         :return: self object
         """
-        start_time = time.time()
-        while timeout > (time.time() - start_time) and self.expand_button.is_available():
-            self.expand_button.click()
-        assert not self.expand_button.is_available(), 'Expand button still presence!'
+        deadline = time.monotonic() + timeout
+        expand_button, rows = self.expand_button, self.all_rows
+        rows_count = rows.get_elements_count(wait=False, silent=True)
+        while expand_button.is_available(silent=True) and time.monotonic() < deadline:
+            expand_button.click()
+            try:
+                rows_count = rows.wait_count_changed(rows_count, timeout=deadline - time.monotonic(), silent=True)
+            except TimeoutException:
+                break
+        assert not expand_button.is_available(), 'Expand button still presence!'
         return self
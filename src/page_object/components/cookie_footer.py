@@ -1,3 +1,4 @@
+from framework.lazy import locator
 from framework.web_element import WebElement
 
 
@@ -9,14 +10,14 @@ class CookieFooter(WebElement):
 
     # Elements
 
-    @property
+    @locator
     def policy(self):
         return WebElement(f'{self.cookie_footer_locator} [id *= policy-text]', name='cookie policy text')
 
-    @property
+    @locator
     def accept_button(self):
         return WebElement(f'{self.cookie_footer_locator} button[id *= accept]', name='accept cookie footer button')
 
-    @property
+    @locator
     def close_button(self):
         return WebElement(f'{self.cookie_footer_locator} button[class *= close]', name='close cookie footer button')
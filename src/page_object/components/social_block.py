@@ -1,4 +1,5 @@
 from selenium.webdriver.common.by import By
+from framework.lazy import parametrized_locator
 from framework.web_element import WebElement
 
 
@@ -8,6 +9,7 @@ class SocialBlock(WebElement):
         self.social_locator = '[class = social_content]'
         super().__init__(self.social_locator, name='social content block')
 
+    @parametrized_locator
     def social_link(self, link_url):
         return WebElement(locator_type=By.CSS_SELECTOR, locator=f'{self.social_locator} a[href = "{link_url}"]',
                           name=f'social link with url: {link_url}')
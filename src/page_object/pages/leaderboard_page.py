@@ -1,12 +1,19 @@
 from random import randint
+from typing import NamedTuple
 
+from framework.lazy import component, locator, parametrized_locator
 from framework.web_element import WebElement
 from framework.web_page import WebPage
 from selenium.webdriver.common.by import By
 
 from src.page_object.components.clan_popup import ClanPopup
 from src.page_object.components.cookie_footer import CookieFooter
-from src.data_for_testing.leaderboard_data import leaderboard_page_url, echelons_data, all_echelons_types
+from src.data_for_testing.leaderboard_data import (
+    leaderboard_page_url,
+    echelons_data,
+    all_echelons_types,
+    LEADERBOARD_REQUESTS,
+)
 from src.page_object.components.social_block import SocialBlock
 
 
@@ -14,8 +21,8 @@ def get_leader_info(clan_data=None, team_data=None, url=None, page_start=None):
     """
     Get and parse for tests needs available info from original clan/team data.
 
-    :param clan_data: dict object from Rest.get_clans request
-    :param team_data: dict object from Rest.get_clan_rewards request
+    :param clan_data: ClanRank object from ModelApi.get_clans request
+    :param team_data: ClanRank object with teams from ModelApi.get_clan_rewards request
     :param url: required for `page_url` key in root dict
     :param page_start: required for `row_id` key in root dict
     :return: dict object ~ {'page_url': '...', 'row_id': '...', 'leader_info': {'clan': {...}, 'team': {...}}}
@@ -24,7 +31,7 @@ def get_leader_info(clan_data=None, team_data=None, url=None, page_start=None):
     leader_info.update(
         {
             'page_url': url,
-            'row_id': clan_data['rank'] - (page_start - 1) if page_start else page_start,
+            'row_id': clan_data.rank - (page_start - 1) if page_start else page_start,
         }
     )
 
@@ -41,16 +48,16 @@ def get_clan_info(clan_data):
     """
     Get and parse for tests needs available info from original clan data.
 
-    :param clan_data: dict object from Rest.get_clans request
+    :param clan_data: ClanRank object from ModelApi.get_clans request
     :return: dict object with parsed data
     """
     return {
-        'id': clan_data['clan']['id'],
-        'rank': clan_data['rank'],
-        'name': clan_data['clan']['name'],
-        'title': f"[{clan_data['clan']['tag']}] {clan_data['clan']['name']}",
-        'efficient': round(clan_data['clan_efficient'] * 100, 1),
-        'points': clan_data['rewards_count'],
+        'id': clan_data.clan.id,
+        'rank': clan_data.rank,
+        'name': clan_data.clan.name,
+        'title': clan_data.clan.title,
+        'efficient': round(clan_data.efficient * 100, 1),
+        'points': clan_data.points,
     }
 
 
@@ -58,52 +65,114 @@ def get_team_info(team_data):
     """
     Get and parse for tests needs available info from original clan data.
 
-    :param team_data: dict object from Rest.get_clan_rewards request
+    :param team_data: ClanRank object with teams from ModelApi.get_clan_rewards request
     :return: dict object with parsed data
     """
-    team_with_available_data = [item for item in team_data['teams'] if item['team']]
+    team_with_available_data = [team for team in team_data.teams if team.title is not None]
     random_id = randint(0, len(team_with_available_data)-1)
     available_data = team_with_available_data[random_id]
     return {
-        'clan_tag': f"[{team_data['clan']['tag']}]",
-        'tournament_name': available_data['team']['tournament']['title'],
-        'tournament_date': available_data['updated_at'],
+        'clan_tag': f'[{team_data.clan.tag}]',
+        'tournament_name': available_data.tournament,
+        'tournament_date': available_data.updated_at,
 
         'row_id': random_id + 1,
-        'name': available_data['team']['title'],
-        'title': f"[{team_data['clan']['tag']}] {available_data['team']['title']}",
-        'efficient': round(available_data['team_efficient'] * 100, 1),
-        'points': available_data['rewards'],
+        'name': available_data.title,
+        'title': f'[{team_data.clan.tag}] {available_data.title}',
+        'efficient': round(available_data.efficient * 100, 1),
+        'points': available_data.points,
     }
 
 
+class TableRow(NamedTuple):
+    """ Clan row of the leaderboard table """
+    rank: int
+    tag: str
+    name: str
+    efficient: float
+    points: int
+
+    @property
+    def title(self):
+        return f'{self.tag} {self.name}'
+
+
+TABLE_SNAPSHOT_SCRIPT = """
+const text = (row, selector) => {
+    const node = row.querySelector(selector);
+    return node ? node.innerText.replace(/\\u00a0/g, ' ').trim() : '';
+};
+return Array.from(document.querySelectorAll(arguments[0])).map(row => {
+    const wrappedPlace = row.querySelector('[class *= "place place"]');
+    return {
+        place: text(row, 'td[class *= place]'),
+        place_class: wrappedPlace ? wrappedPlace.getAttribute('class') : '',
+        tag: text(row, '[class *= clan-tag]'),
+        name: text(row, '[class *= participant_name]'),
+        efficient: text(row, '[class *= efficient]'),
+        points: text(row, '[class *= points]'),
+    };
+});
+"""
+
+
+def parse_rank(place_text, place_class):
+    """
+    Parse clan rank from place cell. Top places are rendered as medals with `place__N` class instead of text
+
+    :param place_text: text of place cell ~ '7' or ''
+    :param place_class: class attribute of wrapped place ~ 'place place__1'
+    :return: int object with clan rank ~ 7
+    """
+    if not place_text:
+        place_text = place_class.split('place__')[1].split()[0]
+    return int(place_text)
+
+
 class LeaderboardPage(WebPage):
+    route_requests = LEADERBOARD_REQUESTS
 
     def __init__(self):
         self.url = leaderboard_page_url
+        super().__init__(By.CSS_SELECTOR, 'main[class *= leaderboard]', name='Leaderboard page')
 
-        self.cookie_footer = CookieFooter()
-        self.carousel = Carousel()
-        self.social_block = SocialBlock()
-        self.searching_form = SearchingForm()
-        self.table = LeaderboardTable()
+    # Components
 
-        super().__init__(By.CSS_SELECTOR, 'main[class *= leaderboard]', name='Leaderboard page')
+    @component
+    def cookie_footer(self):
+        return CookieFooter()
+
+    @component
+    def carousel(self):
+        return Carousel()
+
+    @component
+    def social_block(self):
+        return SocialBlock()
+
+    @component
+    def searching_form(self):
+        return SearchingForm()
+
+    @component
+    def table(self):
+        return LeaderboardTable()
 
     # Elements
 
-    @property
+    @locator
     def season_select_arrow(self):
         return WebElement('[class *= season-select_arrow]', name='seasons select arrow')
 
-    @property
+    @locator
     def season_select_menu(self):
         return WebElement('[class *= season-select_menu]', name='seasons select arrow')
 
     # Functions
 
     def wait_page_table_loaded(self):
-        self.table.spinner.wait_element_hidden()
+        self.wait_network_idle(LEADERBOARD_REQUESTS)
+        self.table.spinner.wait_element_hidden(silent=True)
         return self
 
     def season_item(self, name):
@@ -124,23 +193,25 @@ class Carousel(WebElement):
 
     # Elements
 
-    @property
+    @locator
     def next_echelon(self):
         return WebElement(f'{self.root_locator} [class *= swiper-slide-next]', name=f'next echelon medal')
 
-    @property
+    @locator
     def prev_echelon(self):
         return WebElement(f'{self.root_locator} [class *= swiper-slide-prev]', name=f'previous echelon medal')
 
-    @property
+    @locator
     def unselected_echelons(self):
         return WebElement('[class *= swiper-slide]:not([class *= active])', name='unselected echelons')
 
+    @parametrized_locator
     def echelon(self, echelon_type):
         assert echelon_type in all_echelons_types, f'Please select one of {all_echelons_types}'
         return WebElement(f'{self.root_locator} [class *= swiper-slide] [style *= {echelon_type}]',
                           name=f'{echelon_type} echelon')
 
+    @parametrized_locator
     def echelon_with_title(self, title):
         return WebElement('//*[@class="leaderboard-carousel" and .//*[contains(@class, "swiper-slide-active")] '
                           f'and contains(., "{title}")]', name=f'echelon with title: {title}')
@@ -158,15 +229,16 @@ class Carousel(WebElement):
         """
         assert any((echelon_name, next_echelon, prev_echelon)), 'At least one of parameter required'
 
-        if echelon_name:
-            self.echelon(echelon_name).click()
-            self.echelon_with_title(echelons_data[echelon_name]['title']).wait_element(silent=True)
-        elif next_echelon:
-            self.next_echelon.click()
-        elif prev_echelon:
-            self.prev_echelon.click()
+        with self.expect_requests(LEADERBOARD_REQUESTS):
+            if echelon_name:
+                self.echelon(echelon_name).click()
+                self.echelon_with_title(echelons_data[echelon_name]['title']).wait_element(silent=True)
+            elif next_echelon:
+                self.next_echelon.click()
+            elif prev_echelon:
+                self.prev_echelon.click()
 
-        LeaderboardTable().spinner.wait_element_hidden()
+        LeaderboardTable().spinner.wait_element_hidden(silent=True)
         return self
 
     def available_echelons_range(self):
@@ -180,26 +252,29 @@ class SearchingForm(WebElement):
         self.empty_search_template = 'По вашему запросу ничего не найдено'
         super().__init__(self.root_locator, name='search form')
 
-    @property
+    @locator
     def search_input(self):
         return WebElement(f'{self.root_locator} input[class *= search_input]', name='search input')
 
-    @property
+    @locator
     def clear_button(self):
         return WebElement(f'{self.root_locator} button[class *= search_clear__show]', name='clear input button')
 
+    @parametrized_locator
     def item_by_name(self, clan_name):
         return WebElement(f'//button[contains(@class, "search-list_item") and contains(., "{clan_name}")]',
                           name=f'search item by name: {clan_name}')
 
+    @parametrized_locator
     def tag_by_name(self, clan_name):
         return WebElement(f'//button[contains(@class, "search-list_item") and .//*[contains(., "{clan_name}")]]'
                           f'//*[contains(@class, "tag")]', name=f'search tag by name: {clan_name}')
 
+    @parametrized_locator
     def any_popup_item(self):
         return WebElement(f'//button[contains(@class, "search-list_item")]', name='popup')
 
-    @property
+    @locator
     def empty_search_result(self):
         return WebElement(f'//*[@class="search_result" and .//*[.="{self.empty_search_template}"]]',
                           name=f'empty search result')
@@ -217,60 +292,72 @@ class SearchingForm(WebElement):
 
 class LeaderboardTable(WebElement):
     def __init__(self, search=False):
-        self.clan_popup = ClanPopup()
         self.root_locator = 'table[class *= leaderboard-table]'
         if not search:
             self.root_locator = f'{self.root_locator} tbody[infinite-scroll-disabled]'
         self.table_row_locator = f'{self.root_locator} [class *= table_tr]'
         super().__init__(self.root_locator, name='leaderboard table')
 
+    @component
+    def clan_popup(self):
+        return ClanPopup()
+
     # Elements
 
-    @property
+    @locator
     def all_rows(self):
         return WebElement(self.table_row_locator, name='all table rows')
 
-    @property
+    @locator
     def spinner(self):
         return WebElement(f'{self.root_locator} [class *= waiting_spinner]', name='leaderboard table spinner')
 
-    @property
+    @locator
     def back_to_table_button(self):
         """ back to table button appear after unsuccessful search result """
         return WebElement(f'[class = leaderboard-button-back]', name='leaderboard table back button')
 
+    @parametrized_locator
     def row_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id})',
                           name=f'row by row id: {row_id}')
 
+    @parametrized_locator
     def place_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) td[class *= place]',
                           name=f'place by row id: {row_id}')
 
+    @parametrized_locator
     def wrapped_place_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= "place place"]',
                           name=f'wrapped place by row id: {row_id}')
 
+    @parametrized_locator
     def ico_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) td[class *= place]',
                           name=f'place by row id: {row_id}')
 
+    @parametrized_locator
     def tag_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= clan-tag]',
                           name=f'tag by row id: {row_id}')
 
+    @parametrized_locator
     def name_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= participant_name]',
                           name=f'name by row id: {row_id}')
 
+    @parametrized_locator
     def efficient_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= efficient]',
                           name=f'efficient by row id: {row_id}')
 
+    @parametrized_locator
     def points_by_id(self, row_id):
         return WebElement(f'{self.table_row_locator}:nth-child({row_id}) [class *= points]',
                           name=f'points by row id: {row_id}')
 
+    @parametrized_locator
     def row_by_name(self, clan_name):
         return WebElement(f'//tr[contains(@class, "leaderboard-table") and .//*[contains(., "{clan_name}")]]',
                           name=f'row by clan name: {clan_name}')
@@ -300,9 +387,8 @@ class LeaderboardTable(WebElement):
         :return: int object with clan rank  ~ 7
         """
         rank_text = self.place_by_id(row_id).get_text()
-        if not rank_text:
-            rank_text = self.wrapped_place_by_id(row_id).get_attribute('class').split('place__')[1]
-        return int(rank_text)
+        place_class = '' if rank_text else self.wrapped_place_by_id(row_id).get_attribute('class')
+        return parse_rank(rank_text, place_class)
 
     def get_clan_efficient_by_row_id(self, row_id):
         """
@@ -312,6 +398,25 @@ class LeaderboardTable(WebElement):
         """
         return float(self.efficient_by_id(row_id).get_text())
 
+    def snapshot(self):
+        """
+        Get data of all loaded table rows by single script execution
+
+        :return: list of TableRow objects ~ [TableRow(rank=1, tag='[TAG]', name='Clan Name', ...), ...]
+        """
+        self.all_rows.wait_element(silent=True)
+        rows = self.execute_script(TABLE_SNAPSHOT_SCRIPT, self.table_row_locator, wait=False)
+        return [
+            TableRow(
+                rank=parse_rank(row['place'], row['place_class']),
+                tag=row['tag'],
+                name=row['name'],
+                efficient=float(row['efficient']),
+                points=int(row['points'].replace(' ', '')),
+            )
+            for row in rows
+        ]
+
     def open_clan(self, clan_name=None, row_id=None):
         """
         Open clan popup by clan name or row id
@@ -330,6 +435,7 @@ class LeaderboardTable(WebElement):
 
     def scroll_to_table(self):
         """ Scroll to leaderboard table """
-        self.scroll_to_viewport(block='start')
-        self.spinner.wait_element_hidden()
+        with self.expect_requests(LEADERBOARD_REQUESTS):
+            self.scroll_to_viewport(block='start')
+        self.spinner.wait_element_hidden(silent=True)
         return self
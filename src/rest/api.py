@@ -1,19 +1,347 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on windows, cache locks are process local there
+    fcntl = None
+
 import httpx
 from framework.utils import log, cut_log_data
 
 from src.data_for_testing.general_data import BASE_URL
 from src.data_for_testing.leaderboard_data import DEFAULT_PAGE_SIZE, RANKED_CLANS_COUNT
+from src.rest.throttling import ApiStats, RateLimiter, RetryPolicy
+from src.rest.models import Clan, ClanRank, Season, decode_clan_rewards, decode_results
+from src.utils import gather_limited
+
+API_HTTP2 = os.environ.get('API_HTTP2', '0') == '1'
+API_MAX_CONNECTIONS = int(os.environ.get('API_MAX_CONNECTIONS', 20))
+API_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('API_MAX_KEEPALIVE_CONNECTIONS', 10))
+API_TIMEOUT = float(os.environ.get('API_TIMEOUT', 10))
+API_CACHE = os.environ.get('API_CACHE', '1') == '1'
+API_MODE = os.environ.get('API_MODE', 'live')  # live / record (store responses) / replay (use local stand-in server)
+API_RATE_LIMIT = os.environ.get('API_RATE_LIMIT', '')  # requests per second ~ '10' or 'clans-leaderboard/search/=2,*=10'
+API_RETRIES = int(os.environ.get('API_RETRIES', 0))  # retries on 429/5xx responses, disabled by default
+
+
+class MemoryCacheBackend:
+    """ Responses cache of the current process """
+
+    def __init__(self):
+        self.entries = {}
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, entry):
+        self.entries[key] = entry
+
+    @contextmanager
+    def lock(self, key):
+        """ Exclusive lock of the key. Used for single flight of identical requests """
+        with self.locks_lock:
+            key_lock = self.locks.setdefault(key, threading.Lock())
+        with key_lock:
+            yield
+
+
+class DiskCacheBackend(MemoryCacheBackend):
+    """ Responses cache in directory shared between processes (xdist workers) """
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.directory, f'{key}.json')) as entry_file:
+                return json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, entry):
+        path = os.path.join(self.directory, f'{key}.json')
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}'
+        with open(temp_path, 'w') as entry_file:
+            json.dump(entry, entry_file)
+        os.replace(temp_path, path)  # readers never see partially written entry
+
+    @contextmanager
+    def lock(self, key):
+        with super().lock(key):
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, f'{key}.lock'), 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ResponseCache:
+    """
+    Cache of successful GET responses keyed by method and url.
+    Entries are fresh for `ttl` seconds, expired entries are revalidated by ETag/Last-Modified when server supports it.
+    Identical concurrent requests are coalesced: one request is sent, others wait and read its result.
+    """
+
+    def __init__(self, backend=None, ttl=60, revalidate=True):
+        """
+        :param backend: MemoryCacheBackend or DiskCacheBackend object
+        :param ttl: seconds while stored response is used without request
+        :param revalidate: send conditional request for expired entry instead of full request
+        """
+        self.backend = backend if backend else MemoryCacheBackend()
+        self.ttl = ttl
+        self.revalidate = revalidate
+
+    @staticmethod
+    def key(method, url):
+        return hashlib.sha1(f'{method.upper()} {url}'.encode()).hexdigest()
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry['stored_at'] < self.ttl
+
+    def fetch(self, method, url, send):
+        """
+        Get response from cache or send request
+
+        :param method: request method
+        :param url: full request url
+        :param send: callable(headers dict) that sends request with additional headers
+        :return: httpx.Response object
+        """
+        key = self.key(method, url)
+        entry = self.backend.get(key)
+        if self.is_fresh(entry):
+            return self.build_response(entry)
+
+        with self.backend.lock(key):
+            entry = self.backend.get(key)
+            if self.is_fresh(entry):  # filled by coalesced request
+                return self.build_response(entry)
+
+            response = send(self.conditional_headers(entry))
+            if response.status_code == 304 and entry:
+                entry['stored_at'] = time.time()
+                self.backend.set(key, entry)
+                return self.build_response(entry)
+
+            if 200 <= response.status_code < 300:
+                self.backend.set(key, self.build_entry(method, url, response))
+            return response
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry and self.revalidate:
+            stored_headers = dict(entry['headers'])
+            if 'etag' in stored_headers:
+                headers['If-None-Match'] = stored_headers['etag']
+            if 'last-modified' in stored_headers:
+                headers['If-Modified-Since'] = stored_headers['last-modified']
+        return headers
+
+    @staticmethod
+    def build_entry(method, url, response):
+        return {
+            'method': method.upper(),
+            'url': url,
+            'status_code': response.status_code,
+            'headers': [(name.lower(), value) for name, value in response.headers.items()
+                        if name.lower() not in ('content-encoding', 'content-length', 'transfer-encoding')],
+            'content': base64.b64encode(response.content).decode(),
+            'stored_at': time.time(),
+        }
+
+    @staticmethod
+    def build_response(entry):
+        return httpx.Response(
+            entry['status_code'],
+            headers=entry['headers'],
+            content=base64.b64decode(entry['content']),
+            request=httpx.Request(entry['method'], entry['url']),
+        )
 
 
 class ApiBuilder:
-    def __init__(self, base_url=f'{BASE_URL}/ru/api/'):
+    """ Requests builder over long-lived pooled http client (keep-alive connections reused between requests) """
+
+    def __init__(self, base_url=f'{BASE_URL}/ru/api/', http2=API_HTTP2, timeout=API_TIMEOUT,
+                 max_connections=API_MAX_CONNECTIONS, max_keepalive_connections=API_MAX_KEEPALIVE_CONNECTIONS):
         self.base_url = base_url
+        self.http2 = http2
+        self.timeout = httpx.Timeout(timeout)
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections)
+        self.client = None
+        self.client_lock = threading.Lock()
+        self.cache = None
+        self.cache_bypass = not API_CACHE
+        self.recorder = None
+        self.rate_limiter = RateLimiter.from_string(API_RATE_LIMIT)
+        self.retry = RetryPolicy(retries=API_RETRIES) if API_RETRIES else None
+        self.stats = ApiStats()
 
     def __getattr__(self, request_method):
         return lambda *args, **kwargs: self.request(request_method, *args, **kwargs)
 
-    def request(self, method, url, **kwargs):
-        return httpx.request(method, f'{self.base_url}{url}', **kwargs)
+    def get_client(self):
+        """
+        Client of the current process. Created on first request
+
+        :return: httpx.Client object
+        """
+        with self.client_lock:
+            if self.client is None or self.client.is_closed:
+                try:
+                    self.client = httpx.Client(http2=self.http2, limits=self.limits, timeout=self.timeout)
+                except ImportError:  # http2 requires optional `h2` package
+                    log('HTTP/2 is not available, install "httpx[http2]". Falling back to HTTP/1.1')
+                    self.client = httpx.Client(limits=self.limits, timeout=self.timeout)
+            return self.client
+
+    def request(self, method, url, cache=True, **kwargs):
+        """
+        Send request. GET requests are served from self.cache when it's configured and not bypassed
+
+        :param method: request method
+        :param url: url relative to base url
+        :param cache: allow cached response for this request
+        :param kwargs: kwargs of httpx.Client.request()
+        :return: httpx.Response object
+        """
+        url = f'{self.base_url}{url}'
+        if not cache or self.cache is None or self.cache_bypass or method.upper() != 'GET':
+            return self.recorded(method, self.send(method, url, **kwargs))
+
+        def send(headers):
+            return self.send(method, url, **{**kwargs, 'headers': {**kwargs.get('headers', {}), **headers}})
+
+        return self.recorded(method, self.cache.fetch(method, url, send))
+
+    def send(self, method, url, **kwargs):
+        """
+        Send request through rate limiter, retry throttled and failed responses
+
+        :return: httpx.Response object
+        """
+        client, attempt = self.get_client(), 0
+        while True:
+            wait = self.throttle_delay(url)
+            if wait:
+                time.sleep(wait)
+            response = client.request(method, url, **kwargs)
+            delay = self.retry_delay(attempt, response)
+            if delay is None:
+                return response
+            attempt += 1
+            time.sleep(delay)
+
+    def throttle_delay(self, url):
+        """
+        :param url: absolute request url
+        :return: seconds to wait for rate limiter token
+        """
+        if self.rate_limiter is None:
+            return 0.0
+        wait = self.rate_limiter.reserve(url[len(self.base_url):])
+        if wait:
+            self.stats.record_throttle(wait)
+        return wait
+
+    def retry_delay(self, attempt, response):
+        """
+        :param attempt: count of already made retries
+        :param response: httpx.Response object
+        :return: seconds to wait before retry. None when response is final
+        """
+        delay = self.retry.delay(attempt, response) if self.retry else None
+        if delay is not None:
+            log('Retry {attempt} of {url} after {status} in {delay:.2f} s',
+                attempt=attempt + 1, url=response.request.url, status=response.status_code, delay=delay)
+            self.stats.record_retry(response.status_code)
+        return delay
+
+    def recorded(self, method, response):
+        """ Store response into fixture files when self.recorder is set (API_MODE=record) """
+        if self.recorder is not None:
+            self.recorder.record(method, response)
+        return response
+
+    @contextmanager
+    def live(self, direct=False):
+        """
+        Bypass responses cache inside of the context
+
+        :param direct: also send requests without rate limiter and retries, so a response time is not
+            stretched by throttle and backoff waits ~ latency measurement
+        """
+        bypass, self.cache_bypass = self.cache_bypass, True
+        rate_limiter, retry = self.rate_limiter, self.retry
+        if direct:
+            self.rate_limiter, self.retry = None, None
+        try:
+            yield self
+        finally:
+            self.cache_bypass = bypass
+            self.rate_limiter, self.retry = rate_limiter, retry
+
+    def close(self):
+        """ Close pooled connections. Next request opens a new client """
+        with self.client_lock:
+            if self.client is not None:
+                self.client.close()
+                self.client = None
+
+
+class AsyncApiBuilder(ApiBuilder):
+    """ Requests builder over pooled asynchronous http client. Client is bound to the event loop it's created in """
+
+    def get_client(self):
+        with self.client_lock:
+            if self.client is None or self.client.is_closed:
+                try:
+                    self.client = httpx.AsyncClient(http2=self.http2, limits=self.limits, timeout=self.timeout)
+                except ImportError:  # http2 requires optional `h2` package
+                    log('HTTP/2 is not available, install "httpx[http2]". Falling back to HTTP/1.1')
+                    self.client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            return self.client
+
+    async def request(self, method, url, cache=True, **kwargs):
+        # responses cache is synchronous (file locks), asynchronous requests always go to the server
+        return self.recorded(method, await self.send(method, f'{self.base_url}{url}', **kwargs))
+
+    async def send(self, method, url, **kwargs):
+        client, attempt = self.get_client(), 0
+        while True:
+            wait = self.throttle_delay(url)
+            if wait:
+                await asyncio.sleep(wait)
+            response = await client.request(method, url, **kwargs)
+            delay = self.retry_delay(attempt, response)
+            if delay is None:
+                return response
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """ Close pooled connections. Next request opens a new client """
+        client, self.client = self.client, None
+        if client is not None:
+            await client.aclose()
 
 
 class Api:
@@ -36,7 +364,7 @@ class Api:
         :param clan_info: clan name or tag to search for
         :return: Request object - clan searching request
         """
-        log(f'Searching clan with given info: "{cut_log_data(clan_info)}"')
+        log('Searching clan with given info: "{clan_info}"', clan_info=cut_log_data(clan_info))
         clan_name = clan_info.replace(' ', '+')
         return self.api.get(f'clans-leaderboard/search/?query={clan_name}')
 
@@ -47,12 +375,47 @@ class Api:
         :param page: page number
         :param size: page size
         :param gte: starting index
-        :param lte: stopping index
+        :param lte: stopping index. None - without upper bound
         :return: Request object - ranked clans request
         """
-        log(f'Get ranked clans with: page_size={size}, page_start={gte}, page_stop={lte}')
+        log('Get ranked clans with: page={page}, page_size={size}, page_start={gte}, page_stop={lte}',
+            page=page, size=size, gte=gte, lte=lte)
         root_url = 'clans-leaderboard/tournamentCupX/'
-        return self.api.get(f'{root_url}?page={page}&page_size={size}&rank__gte={gte}&rank__lte={lte}')
+        rank_bounds = f'rank__gte={gte}' if lte is None else f'rank__gte={gte}&rank__lte={lte}'
+        return self.api.get(f'{root_url}?page={page}&page_size={size}&{rank_bounds}')
+
+    def iter_clans(self, gte=1, lte=None, page_size=DEFAULT_PAGE_SIZE, prefetch=True):
+        """
+        Lazily iterate leaderboard clans page by page.
+        Next page is requested in background while the current one is consumed, only two pages are kept in memory
+
+        :param gte: starting rank
+        :param lte: stopping rank. None - until the last page
+        :param page_size: clans count requested per page
+        :param prefetch: request next page in background
+        :return: generator of dict objects - clan data
+        """
+        def fetch_page(page):
+            return Api.get_clans(self, page=page, size=page_size, gte=gte, lte=lte).json()
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            page = 1
+            next_page = executor.submit(fetch_page, page) if prefetch else None
+            while True:
+                response = next_page.result() if prefetch else fetch_page(page)
+                results = response['results']
+                has_next = bool(response['next']) if 'next' in response else len(results) == page_size
+                if prefetch and has_next:
+                    next_page = executor.submit(fetch_page, page + 1)
+
+                for clan in results:
+                    if lte is not None and clan['rank'] > lte:
+                        return
+                    yield clan
+
+                if not has_next or not results:
+                    return
+                page += 1
 
     def get_clan_rewards(self, clan_id):
         """
@@ -61,7 +424,7 @@ class Api:
         :param clan_id: clan id
         :return: Request object - clan rewards request
         """
-        log(f'Get clan rewards by clan id: "{clan_id}"')
+        log('Get clan rewards by clan id: "{clan_id}"', clan_id=clan_id)
         return self.api.get(f'clans-leaderboard/tournamentCupX/{clan_id}/')
 
 
@@ -119,10 +482,135 @@ class UIApi(Api):
         :param kwargs: kwargs of self.get_clans()
         :return: dict object - clans with specified value of teams rewards
         """
-        clans_with_large_rewards = []
-        for clan in self.get_clans(**kwargs):
-            clan_rewards_response = self.get_clan_rewards(clan['clan']['id'])
-            if len(clan_rewards_response['teams']) > more_than:
-                clans_with_large_rewards.append(clan_rewards_response)
+        return AsyncUIApi.run(lambda api: api.get_clans_with_rewards(more_than=more_than, **kwargs))
 
-        return clans_with_large_rewards
+    def get_clans_rewards(self, clan_ids):
+        """
+        Responses for rewards of several clans, requested concurrently
+
+        :param clan_ids: list of clan ids
+        :return: list of dict objects - rewards data in order of given ids
+        """
+        return AsyncUIApi.run(lambda api: api.get_clans_rewards(clan_ids))
+
+
+class ModelApi(Api):
+    """ Api requests with responses decoded into typed models """
+
+    def __init__(self):
+        self.parent_methods = super()
+        self.api = self.parent_methods.api
+
+    def get_seasons(self):
+        """
+        Available tournament seasons
+
+        :return: list of Season objects
+        """
+        return decode_results(self.parent_methods.get_seasons().content, Season)
+
+    def search_clan(self, clan_info):
+        """
+        Clans found by given tag/name
+
+        :param clan_info: clan name or tag to search for
+        :return: list of Clan objects
+        """
+        return decode_results(self.parent_methods.search_clan(clan_info).content, Clan)
+
+    def get_clans(self, page=1, size=DEFAULT_PAGE_SIZE, gte=1, lte=RANKED_CLANS_COUNT):
+        """
+        Leaderboard clans with custom settings
+
+        :param page: page number
+        :param size: page size
+        :param gte: starting index
+        :param lte: stopping index
+        :return: list of ClanRank objects without teams
+        """
+        return decode_results(self.parent_methods.get_clans(page=page, size=size, gte=gte, lte=lte).content, ClanRank)
+
+    def get_clan_rewards(self, clan_id):
+        """
+        Clan with rewards of its teams
+
+        :param clan_id: clan id
+        :return: ClanRank object with teams
+        """
+        return decode_clan_rewards(self.parent_methods.get_clan_rewards(clan_id=clan_id).content)
+
+
+class AsyncApi(Api):
+    """ Asynchronous counterpart of Api: the same requests, methods return coroutines """
+
+    def __init__(self, concurrency=8):
+        """
+        :param concurrency: max count of simultaneous requests in gather helpers
+        """
+        self.api = AsyncApiBuilder(base_url=Api.api.base_url, http2=Api.api.http2)
+        self.api.recorder = Api.api.recorder
+        self.api.rate_limiter, self.api.retry, self.api.stats = Api.api.rate_limiter, Api.api.retry, Api.api.stats
+        self.concurrency = concurrency
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.api.aclose()
+
+    @classmethod
+    def run(cls, call, **kwargs):
+        """
+        Run coroutine with a new api object from synchronous code
+
+        :param call: callable(api object) that returns coroutine
+        :param kwargs: kwargs of api object
+        :return: coroutine result
+        """
+        async def session():
+            async with cls(**kwargs) as api:
+                return await call(api)
+
+        return asyncio.run(session())
+
+
+class AsyncUIApi(AsyncApi):
+    """ Customised asynchronous api requests for UI automation needs """
+
+    async def get_clans(self, page=1, size=DEFAULT_PAGE_SIZE, gte=1, lte=RANKED_CLANS_COUNT):
+        """
+        Results for leaderboard clans with custom settings
+
+        :return: dict object - results available clans data
+        """
+        return (await super().get_clans(page=page, size=size, gte=gte, lte=lte)).json()['results']
+
+    async def get_clan_rewards(self, clan_id):
+        """
+        Response for clan rewards
+
+        :param clan_id: clan id
+        :return: dict object - rewards data for each team in clan
+        """
+        return (await super().get_clan_rewards(clan_id=clan_id)).json()
+
+    async def get_clans_rewards(self, clan_ids):
+        """
+        Responses for rewards of several clans. Not more than `self.concurrency` requests at once
+
+        :param clan_ids: list of clan ids
+        :return: list of dict objects - rewards data in order of given ids
+        """
+        return await gather_limited((self.get_clan_rewards(clan_id) for clan_id in clan_ids), self.concurrency)
+
+    async def get_clans_with_rewards(self, more_than=6, **kwargs):
+        """
+        Get clans with custom rewards count from teams
+
+        :param more_than: more than *value* rewards count
+        :param kwargs: kwargs of self.get_clans()
+        :return: dict object - clans with specified value of teams rewards
+        """
+        clans = await self.get_clans(**kwargs)
+        clans_rewards = await self.get_clans_rewards([clan['clan']['id'] for clan in clans])
+        return [clan_rewards for clan_rewards in clans_rewards if len(clan_rewards['teams']) > more_than]
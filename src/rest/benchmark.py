@@ -0,0 +1,50 @@
+"""
+Requests per second of the api client: new connection per request vs pooled ApiBuilder client.
+
+Usage: `python -m src.rest.benchmark --requests 100 --path tournaments/seasons/`
+"""
+import argparse
+import time
+
+import httpx
+
+from src.rest.api import ApiBuilder
+
+
+def measure(send, requests_count):
+    """
+    Send requests sequentially and measure throughput
+
+    :param send: callable without arguments that sends one request
+    :param requests_count: count of requests
+    :return: requests per second
+    """
+    start_time = time.perf_counter()
+    for _ in range(requests_count):
+        send().raise_for_status()
+    return requests_count / (time.perf_counter() - start_time)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=50, help='requests count for each client')
+    parser.add_argument('--path', default='tournaments/seasons/', help='api path relative to base url')
+    parser.add_argument('--base-url', default=None, help='api base url. `BASE_URL` environment variable by default')
+    parser.add_argument('--http2', action='store_true', help='use HTTP/2 for pooled client')
+    options = parser.parse_args(args)
+
+    api = ApiBuilder(http2=options.http2) if not options.base_url else ApiBuilder(options.base_url, options.http2)
+    url = f'{api.base_url}{options.path}'
+
+    api.get(options.path)  # warm up: dns, first connection
+    per_request = measure(lambda: httpx.get(url), options.requests)
+    pooled = measure(lambda: api.get(options.path), options.requests)
+    api.close()
+
+    print(f'Url: {url}')
+    print(f'New connection per request: {per_request:.1f} req/s')
+    print(f'Pooled client:              {pooled:.1f} req/s ({pooled / per_request:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import json
+import os
+import re
+import time
+
+from src.rest.load import LatencyHistogram
+
+DEFAULT_REPEAT = 20
+BUDGET_KEY = re.compile(r'^p(\d+(?:\.\d+)?)_ms$')  # p95_ms=300 - 95th percentile budget in milliseconds
+
+
+def parse_budgets(marker_kwargs):
+    """
+    Latency budgets from `latency` marker kwargs
+
+    :param marker_kwargs: dict object ~ {'p95_ms': 300, 'p50_ms': 100, 'repeat': 10}
+    :return: dict object percentile: budget ms ~ {50.0: 100, 95.0: 300}
+    """
+    budgets = {}
+    for key, value in marker_kwargs.items():
+        match = BUDGET_KEY.match(key)
+        if match:
+            budgets[float(match.group(1))] = value
+    return dict(sorted(budgets.items()))
+
+
+def measure(call, repeat=DEFAULT_REPEAT):
+    """
+    Call api request several times and record its latencies
+
+    :param call: callable without arguments that sends one request and returns httpx.Response
+    :param repeat: count of calls
+    :return: tuple(LatencyHistogram object, list of failed status codes)
+    """
+    histogram, failed = LatencyHistogram(), []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        response = call()
+        histogram.record(time.perf_counter() - start_time)
+        if response.status_code >= 400:
+            failed.append(response.status_code)
+    return histogram, failed
+
+
+class LatencyHistory:
+    """ Latency results of previous runs, one json line per measurement """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, record):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as history_file:
+            history_file.write(json.dumps(record) + '\n')
+
+    def last(self, name):
+        """
+        Last recorded measurement of given name
+
+        :param name: measurement name ~ 'get_clans'
+        :return: dict object or None
+        """
+        if not os.path.isfile(self.path):
+            return None
+        record = None
+        with open(self.path, encoding='utf-8') as history_file:
+            for line in history_file:
+                item = json.loads(line)
+                if item['name'] == name:
+                    record = item
+        return record
+
+
+def build_record(name, histogram, budgets, base_url):
+    """
+    :return: dict object for LatencyHistory ~ {'name': 'get_clans', 'p95_ms': 120.5, 'max_ms': 180.0, ...}
+    """
+    percentiles = sorted({50.0, 90.0, 99.0, *budgets})
+    record = {'name': name, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'base_url': base_url,
+              'count': histogram.count}
+    record.update({f'p{percent:g}_ms': round(histogram.percentile(percent) * 1000, 1) for percent in percentiles})
+    record['max_ms'] = round(histogram.max * 1000, 1)
+    return record
+
+
+def check_budgets(record, budgets, previous=None):
+    """
+    :param record: dict object from build_record
+    :param budgets: dict object from parse_budgets
+    :param previous: previous record of the same measurement
+    :return: list of string objects - exceeded budgets ~ ['p95 312.4 ms > 300 ms (previous run 120.1 ms)']
+    """
+    exceeded = []
+    for percent, budget in budgets.items():
+        key = f'p{percent:g}_ms'
+        if record[key] > budget:
+            previous_value = f' (previous run {previous[key]} ms)' if previous and key in previous else ''
+            exceeded.append(f'p{percent:g} {record[key]} ms > {budget} ms{previous_value}')
+    return exceeded
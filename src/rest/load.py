@@ -0,0 +1,254 @@
+"""
+Load generator for the leaderboard api. Requests are the same as in Api, sent by asyncio engine.
+
+Usage:
+    closed model (fixed concurrency): `python -m src.rest.load --concurrency 20 --duration 30`
+    open model (fixed arrival rate):  `python -m src.rest.load --rps 100 --duration 30`
+"""
+import argparse
+import asyncio
+import logging
+import math
+import random
+import time
+from collections import Counter
+
+import httpx
+from framework.logger import framework_logger
+
+from src.data_for_testing.leaderboard_data import RANKED_CLANS_COUNT, echelons_data
+from src.rest.api import Api, AsyncApi, AsyncApiBuilder
+from src.utils import parse_echelon_data
+
+DEFAULT_MIX = 'clans=4,rewards=3,search=2,seasons=1'
+HISTOGRAM_PRECISION = 0.01  # relative error of latency percentiles
+PERCENTILES = (50, 90, 99)
+
+
+class LatencyHistogram:
+    """ Log-linear latency histogram: constant memory, percentiles with HISTOGRAM_PRECISION relative error """
+
+    def __init__(self, precision=HISTOGRAM_PRECISION):
+        self.log_base = math.log1p(precision)
+        self.buckets = Counter()
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, latency):
+        """
+        :param latency: seconds
+        """
+        self.buckets[math.floor(math.log(max(latency, 1e-6)) / self.log_base)] += 1  # int() is off by one below 1 s
+        self.count += 1
+        self.max = max(self.max, latency)
+
+    def percentile(self, percent):
+        """
+        :param percent: percentile ~ 99
+        :return: latency in seconds. 0 for empty histogram
+        """
+        if not self.count:
+            return 0.0
+        threshold, seen = math.ceil(self.count * percent / 100), 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                return min(math.exp((bucket + 0.5) * self.log_base), self.max)
+        return self.max
+
+
+class ScenarioStats:
+    """ Latencies and errors of one scenario """
+
+    def __init__(self):
+        self.latencies = LatencyHistogram()
+        self.errors = Counter()
+
+    def record(self, latency, error=None):
+        self.latencies.record(latency)
+        if error:
+            self.errors[error] += 1
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+
+class LoadGenerator:
+    """
+    Sends weighted mix of api requests with closed (fixed concurrency) or open (fixed arrival rate) workload model
+
+    :param api: AsyncApi object
+    :param mix: dict object ~ {'clans': 4, 'rewards': 3}. Keys from self.scenarios
+    :param clans: list of ranked clans data used for rewards/search requests
+    """
+
+    def __init__(self, api, mix, clans):
+        self.api = api
+        self.clans = clans
+        self.echelons = [parse_echelon_data(echelon_data) for echelon_data in echelons_data.values()]
+        self.scenarios = {
+            'clans': self.get_clans,
+            'rewards': lambda: self.api.get_clan_rewards(random.choice(self.clans)['clan']['id']),
+            'search': lambda: self.api.search_clan(random.choice(self.clans)['clan']['name']),
+            'seasons': self.api.get_seasons,
+        }
+        unknown = set(mix) - set(self.scenarios)
+        if unknown:
+            raise ValueError(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+        self.names, self.weights = list(mix), list(mix.values())
+        self.stats = {name: ScenarioStats() for name in self.names}
+        self.dropped = 0
+        self.elapsed = 0.0
+
+    def get_clans(self):
+        page_size, page_start, page_stop, _ = random.choice(self.echelons)
+        return self.api.get_clans(size=page_size, gte=page_start, lte=page_stop)
+
+    async def send(self, scheduled_at=None):
+        """
+        Send one request of random scenario
+
+        :param scheduled_at: perf_counter time the request should have started at (open model).
+            Latency is counted from it, so server slowdown is not hidden by late sending
+        """
+        name = random.choices(self.names, self.weights)[0]
+        start_time = time.perf_counter() if scheduled_at is None else scheduled_at
+        error = None
+        try:
+            response = await self.scenarios[name]()
+            if response.status_code >= 400:
+                error = f'HTTP {response.status_code}'
+        except httpx.HTTPError as exception:
+            error = type(exception).__name__
+        self.stats[name].record(time.perf_counter() - start_time, error)
+
+    async def run_closed(self, concurrency, duration):
+        """
+        Closed model: `concurrency` users send the next request right after the previous response
+
+        :param concurrency: count of simultaneous users
+        :param duration: seconds
+        """
+        stop_at = time.perf_counter() + duration
+
+        async def user():
+            while time.perf_counter() < stop_at:
+                await self.send()
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        self.elapsed = time.perf_counter() - start_time
+
+    async def run_open(self, rps, duration, max_in_flight=1000, poisson=True):
+        """
+        Open model: requests arrive with `rps` rate independently of responses
+
+        :param rps: target requests per second
+        :param duration: seconds
+        :param max_in_flight: arrivals above this count of pending requests are dropped and counted
+        :param poisson: exponential inter-arrival times, otherwise uniform
+        """
+        in_flight = set()
+        start_time = time.perf_counter()
+        next_at, stop_at = start_time, start_time + duration
+        while next_at < stop_at:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) < max_in_flight:
+                task = asyncio.ensure_future(self.send(scheduled_at=next_at))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            else:
+                self.dropped += 1
+            next_at += random.expovariate(rps) if poisson else 1 / rps
+        if in_flight:
+            await asyncio.wait(in_flight)
+        self.elapsed = time.perf_counter() - start_time
+
+    def report(self):
+        """
+        :return: list of report lines
+        """
+        header = f'{"scenario":<10}{"requests":>10}{"errors":>8}{"error %":>9}{"req/s":>9}' + ''.join(
+            f'{f"p{percent} ms":>10}' for percent in PERCENTILES) + f'{"max ms":>10}'
+        lines = [header]
+        total = ScenarioStats()
+        for name in self.names:
+            stats = self.stats[name]
+            lines.append(self._report_line(name, stats))
+            for bucket, count in stats.latencies.buckets.items():
+                total.latencies.buckets[bucket] += count
+            total.latencies.count += stats.latencies.count
+            total.latencies.max = max(total.latencies.max, stats.latencies.max)
+            total.errors.update(stats.errors)
+        lines.append(self._report_line('total', total))
+        for error, count in total.errors.most_common():
+            lines.append(f'error {error}: {count}')
+        if self.dropped:
+            lines.append(f'dropped arrivals (max in flight reached): {self.dropped}')
+        return lines
+
+    def _report_line(self, name, stats):
+        count = stats.latencies.count
+        error_rate = stats.error_count / count * 100 if count else 0.0
+        throughput = count / self.elapsed if self.elapsed else 0.0
+        percentiles = ''.join(f'{stats.latencies.percentile(percent) * 1000:>10.1f}' for percent in PERCENTILES)
+        return (f'{name:<10}{count:>10}{stats.error_count:>8}{error_rate:>9.2f}{throughput:>9.1f}'
+                f'{percentiles}{stats.latencies.max * 1000:>10.1f}')
+
+
+def parse_mix(mix):
+    """
+    :param mix: string object ~ 'clans=4,rewards=1'
+    :return: dict object ~ {'clans': 4.0, 'rewards': 1.0}
+    """
+    weights = {}
+    for item in filter(None, mix.split(',')):
+        name, _, weight = item.partition('=')
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+async def run(options):
+    base_url = options.base_url or Api.api.base_url
+    connections = options.connections or (options.max_in_flight if options.rps else options.concurrency)
+    api = AsyncApi()
+    api.api = AsyncApiBuilder(base_url=base_url, http2=options.http2,
+                              max_connections=connections, max_keepalive_connections=connections)
+    api.api.retry = None  # retries would hide errors under load
+    async with api:
+        clans = (await api.get_clans(size=RANKED_CLANS_COUNT)).json()['results']  # warm up and data for requests
+        generator = LoadGenerator(api, parse_mix(options.mix), clans)
+        if options.rps:
+            await generator.run_open(options.rps, options.duration, options.max_in_flight, not options.uniform)
+        else:
+            await generator.run_closed(options.concurrency, options.duration)
+
+    model = f'open, {options.rps} rps' if options.rps else f'closed, {options.concurrency} users'
+    print(f'Url: {base_url}\nModel: {model}, {generator.elapsed:.1f} s')
+    print('\n'.join(generator.report()))
+    return generator
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Load generator for the leaderboard api')
+    parser.add_argument('--base-url', default=None,
+                        help='api base url ~ http://127.0.0.1:8000/ru/api/. `BASE_URL` environment variable by default')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load')
+    parser.add_argument('--concurrency', type=int, default=10, help='closed model: count of simultaneous users')
+    parser.add_argument('--rps', type=float, default=None, help='open model: target requests per second')
+    parser.add_argument('--max-in-flight', type=int, default=1000, help='open model: limit of pending requests')
+    parser.add_argument('--uniform', action='store_true', help='open model: uniform instead of poisson arrivals')
+    parser.add_argument('--connections', type=int, default=None, help='connection pool size. Load level by default')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'scenario weights. Default: {DEFAULT_MIX}')
+    parser.add_argument('--http2', action='store_true', help='use HTTP/2')
+    options = parser.parse_args(args)
+
+    framework_logger.set_level(logging.WARNING)  # request logs of Api would dominate the run time
+    asyncio.run(run(options))
+
+
+if __name__ == '__main__':
+    main()
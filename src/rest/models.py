@@ -0,0 +1,106 @@
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional faster decoder, standard json is used without it
+    orjson = None
+
+
+def loads(content):
+    """
+    Decode json response body. orjson is used when installed
+
+    :param content: bytes or string object with json
+    :return: decoded object
+    """
+    return orjson.loads(content) if orjson else json.loads(content)
+
+
+@dataclass
+class Season:
+    """ Tournament season """
+    __slots__ = ('title',)
+    title: str
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['title'])
+
+
+@dataclass
+class Clan:
+    """ Clan info from leaderboard and search responses """
+    __slots__ = ('id', 'tag', 'name', 'small_emblem', 'big_emblem')
+    id: int
+    tag: str
+    name: str
+    small_emblem: Optional[str]
+    big_emblem: Optional[str]
+
+    @property
+    def title(self):
+        return f'[{self.tag}] {self.name}'
+
+    @classmethod
+    def from_dict(cls, data):
+        emblems = data.get('emblems') or {}
+        return cls(data['id'], data['tag'], data['name'], emblems.get('small'), emblems.get('big'))
+
+
+@dataclass
+class TeamReward:
+    """ Tournament reward of clan team. Team info is None for teams hidden by api """
+    __slots__ = ('team_id', 'title', 'tournament', 'efficient', 'points', 'updated_at', 'used')
+    team_id: int
+    title: Optional[str]
+    tournament: Optional[str]
+    efficient: float
+    points: int
+    updated_at: str
+    used: bool
+
+    @classmethod
+    def from_dict(cls, data):
+        team = data.get('team') or {}
+        tournament = team.get('tournament') or {}
+        return cls(data['team_id'], team.get('title'), tournament.get('title'), data['team_efficient'],
+                   data['rewards'], data['updated_at'], data['used'])
+
+
+@dataclass
+class ClanRank:
+    """ Ranked clan of the leaderboard. Teams are filled only from clan rewards response """
+    __slots__ = ('rank', 'clan', 'efficient', 'points', 'teams')
+    rank: int
+    clan: Clan
+    efficient: float
+    points: int
+    teams: Tuple[TeamReward, ...]
+
+    @classmethod
+    def from_dict(cls, data):
+        teams = tuple(TeamReward.from_dict(team) for team in data.get('teams') or ())
+        return cls(data['rank'], Clan.from_dict(data['clan']), data['clan_efficient'], data['rewards_count'], teams)
+
+
+def decode_results(content, model):
+    """
+    Decode `results` of paginated response into models
+
+    :param content: response body
+    :param model: model class ~ ClanRank
+    :return: list of model objects
+    """
+    return [model.from_dict(item) for item in loads(content)['results']]
+
+
+def decode_clan_rewards(content):
+    """
+    Decode clan rewards response
+
+    :param content: response body
+    :return: ClanRank object with teams
+    """
+    return ClanRank.from_dict(loads(content))
@@ -0,0 +1,184 @@
+from typing import NamedTuple
+
+from src.rest.models import loads
+
+
+class Violation(NamedTuple):
+    """ Response field that does not match schema """
+    path: str
+    message: str
+
+
+class Field:
+    """
+    Declarative schema of single value
+
+    :param types: allowed type or tuple of types ~ (int, float)
+    :param required: key must be present in parent object
+    :param nullable: None value is allowed
+    :param truthy: value must not be empty/zero ~ '' or 0.0 are violations
+    """
+
+    def __init__(self, types, required=True, nullable=False, truthy=False):
+        self.types = types
+        self.required = required
+        self.nullable = nullable
+        self.truthy = truthy
+
+
+STRING = Field(str, truthy=True)
+NUMBER = Field((int, float), truthy=True)
+ID = Field(int, truthy=True)
+
+SEASON_SCHEMA = {'title': STRING}
+CLAN_SCHEMA = {
+    'id': ID,
+    'tag': STRING,
+    'name': STRING,
+    'emblems': {'small': STRING, 'big': STRING},
+}
+CLAN_RANK_SCHEMA = {
+    'rank': ID,
+    'clan': CLAN_SCHEMA,
+    'clan_efficient': NUMBER,
+    'rewards_count': Field(int),
+}
+TEAM_REWARD_SCHEMA = {
+    'team_id': ID,
+    # team info is hidden by api for some teams: https://github.com/VladimirPodolyan/HTFW/issues/2
+    'team': ({'title': STRING, 'tournament': {'title': STRING}}, Field(dict, nullable=True)),
+    'team_efficient': NUMBER,
+    'rewards': Field(int),
+    'updated_at': STRING,
+    'used': Field(bool),
+}
+
+SEASONS_RESPONSE_SCHEMA = {'results': [SEASON_SCHEMA]}
+SEARCH_RESPONSE_SCHEMA = {'results': [CLAN_SCHEMA]}
+CLANS_RESPONSE_SCHEMA = {
+    'count': Field(int, required=False),
+    'next': Field(str, required=False, nullable=True),
+    'previous': Field(str, required=False, nullable=True),
+    'results': [CLAN_RANK_SCHEMA],
+}
+CLAN_REWARDS_RESPONSE_SCHEMA = dict(CLAN_RANK_SCHEMA, teams=[TEAM_REWARD_SCHEMA])
+
+
+def compile_schema(schema):
+    """
+    Compile declarative schema into validator function. Schema is walked once here, not on every validation
+
+    Schema items:
+        Field object - value type and constraints
+        dict object - object with listed keys, values are schemas of keys
+        list object with single schema - array of items matching schema
+        tuple(schema, Field) - nested schema with type constraints of the value itself
+
+    :param schema: schema item
+    :return: callable(value, path, violations) that appends Violation objects for every mismatch
+    """
+    if isinstance(schema, Field):
+        return _compile_field(schema)
+    if isinstance(schema, tuple):
+        nested, field = schema
+        check_field, check_nested = _compile_field(field), compile_schema(nested)
+
+        def check_value(value, path, violations):
+            if check_field(value, path, violations) and value is not None:
+                check_nested(value, path, violations)
+            return True
+
+        return check_value
+    if isinstance(schema, list):
+        return _compile_array(compile_schema(schema[0]))
+    return _compile_object(schema)
+
+
+def _compile_field(field):
+    def check_field(value, path, violations):
+        if value is None:
+            if not field.nullable:
+                violations.append(Violation(path, 'null value'))
+            return field.nullable
+        if not isinstance(value, field.types) or (field.types is int and isinstance(value, bool)):
+            violations.append(Violation(path, f'unexpected type {type(value).__name__}'))
+            return False
+        if field.truthy and not value:
+            violations.append(Violation(path, f'empty value {value!r}'))
+        return True
+
+    return check_field
+
+
+def _compile_array(check_item):
+    def check_array(value, path, violations):
+        if not isinstance(value, list):
+            violations.append(Violation(path, f'expected array, got {type(value).__name__}'))
+            return False
+        for index, item in enumerate(value):
+            check_item(item, f'{path}[{index}]', violations)
+        return True
+
+    return check_array
+
+
+def _compile_object(schema):
+    keys = tuple(
+        (key, compile_schema(item), getattr(item, 'required', True)) for key, item in schema.items()
+    )
+
+    def check_object(value, path, violations):
+        if not isinstance(value, dict):
+            violations.append(Violation(path, f'expected object, got {type(value).__name__}'))
+            return False
+        for key, check_key, required in keys:
+            if key in value:
+                check_key(value[key], f'{path}.{key}', violations)
+            elif required:
+                violations.append(Violation(f'{path}.{key}', 'missing key'))
+        return True
+
+    return check_object
+
+
+class Validator:
+    """ Compiled response schema """
+
+    def __init__(self, schema):
+        self.check = compile_schema(schema)
+
+    def validate(self, data):
+        """
+        Validate every field of decoded response
+
+        :param data: decoded json
+        :return: list of Violation objects. Empty list for valid data
+        """
+        violations = []
+        self.check(data, '$', violations)
+        return violations
+
+    def validate_response(self, response):
+        """
+        Validate response body
+
+        :param response: httpx.Response object
+        :return: list of Violation objects. Empty list for valid response
+        """
+        return self.validate(loads(response.content))
+
+
+SEASONS_VALIDATOR = Validator(SEASONS_RESPONSE_SCHEMA)
+SEARCH_VALIDATOR = Validator(SEARCH_RESPONSE_SCHEMA)
+CLANS_VALIDATOR = Validator(CLANS_RESPONSE_SCHEMA)
+CLAN_REWARDS_VALIDATOR = Validator(CLAN_REWARDS_RESPONSE_SCHEMA)
+
+
+def format_violations(violations):
+    """
+    Format violations for assertion message
+
+    :param violations: list of Violation objects
+    :return: string object ~ '$.results[3].clan.tag: empty value \'\''
+    """
+    return '\n'.join(f'{violation.path}: {violation.message}' for violation in violations)
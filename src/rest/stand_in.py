@@ -0,0 +1,281 @@
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from framework.utils import log
+
+from src.data_for_testing.leaderboard_data import RANKED_CLANS_COUNT, echelons_data
+from src.rest.api import Api, UIApi
+from src.utils import parse_echelon_data
+
+API_ROOT = '/ru/api/'
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data_for_testing')
+RECORDINGS_DIR = os.environ.get('API_RECORDINGS', os.path.join(DATA_DIR, 'recordings'))
+REPLICA_DIR = os.path.join(DATA_DIR, 'leaderboard_replica')  # local replica of the leaderboard page
+REPLICA_PAGE_PATHS = ('/ru/clans-leaderboard', '/ru/clans-leaderboard/')
+REPLICA_STATIC_ROOT = '/stand-in/'
+MAX_URL_LENGTH = 8190  # longer request lines are rejected like by the production web server
+
+
+def request_key(method, path, query=''):
+    """
+    Normalized request key: query parameters are sorted
+
+    :param method: request method ~ 'GET'
+    :param path: url path relative to api root ~ 'clans-leaderboard/tournamentCupX/'
+    :param query: url query ~ 'page=1&page_size=8'
+    :return: string object ~ 'GET clans-leaderboard/tournamentCupX/?page=1&page_size=8'
+    """
+    query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return f'{method.upper()} {path}?{query}' if query else f'{method.upper()} {path}'
+
+
+class Recorder:
+    """ Stores api responses into fixture files for replaying by StandInServer """
+
+    def __init__(self, directory=RECORDINGS_DIR, api_root=API_ROOT):
+        self.directory = directory
+        self.api_root = api_root
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, method, response):
+        """
+        Store response into fixture file. File name is built from request path and query hash
+
+        :param method: request method
+        :param response: httpx.Response object
+        :return: path to fixture file
+        """
+        url = urlsplit(str(response.request.url))
+        path = url.path.split(self.api_root, 1)[-1]
+        key = request_key(method, path, url.query)
+        slug = re.sub(r'[^a-zA-Z0-9]+', '_', path).strip('_')
+        file_name = f'{method.lower()}_{slug}_{hashlib.sha1(key.encode()).hexdigest()[:10]}.json'
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+
+        recording = {
+            'key': key,
+            'status_code': response.status_code,
+            'content_type': response.headers.get('content-type', 'application/json'),
+            'body': body,
+        }
+        file_path = os.path.join(self.directory, file_name)
+        with open(file_path, 'w', encoding='utf-8') as recording_file:
+            json.dump(recording, recording_file, ensure_ascii=False, indent=2)
+        return file_path
+
+
+class Recordings:
+    """ Recorded responses with emulation of leaderboard api for requests that were not recorded """
+
+    def __init__(self, directory=RECORDINGS_DIR):
+        self.responses = {}
+        if os.path.isdir(directory):
+            for file_name in sorted(os.listdir(directory)):
+                if file_name.endswith('.json'):
+                    with open(os.path.join(directory, file_name), encoding='utf-8') as recording_file:
+                        recording = json.load(recording_file)
+                    self.responses[recording['key']] = recording
+        self.clans = self._collect_clans()
+
+    def _collect_clans(self):
+        """ All recorded ranked clans, unique and sorted by rank """
+        clans = {}
+        for key, recording in self.responses.items():
+            if key.startswith('GET clans-leaderboard/tournamentCupX/?') and isinstance(recording['body'], dict):
+                for clan in recording['body'].get('results', []):
+                    clans[clan['clan']['id']] = clan
+        return sorted(clans.values(), key=lambda clan: clan['rank'])
+
+    def response(self, method, path, query):
+        """
+        Recorded or emulated response
+
+        :return: tuple(status code, content type, body)
+        """
+        recording = self.responses.get(request_key(method, path, query))
+        if recording:
+            return recording['status_code'], recording['content_type'], recording['body']
+
+        params = dict(parse_qsl(query))
+        if method == 'GET' and path == 'clans-leaderboard/tournamentCupX/' and self.clans:
+            return 200, 'application/json', self._clans_page(params)
+        if method == 'GET' and path == 'clans-leaderboard/search/':
+            return 200, 'application/json', self._search(params.get('query', ''))
+        return 404, 'application/json', {'detail': f'Not recorded: {request_key(method, path, query)}'}
+
+    def _clans_page(self, params):
+        page, page_size = int(params.get('page', 1)), int(params.get('page_size', 8))
+        gte, lte = int(params.get('rank__gte', 1)), int(params.get('rank__lte', self.clans[-1]['rank']))
+        clans = [clan for clan in self.clans if gte <= clan['rank'] <= lte]
+        start = (page - 1) * page_size
+        return {
+            'count': len(clans),
+            'next': f'?page={page + 1}' if start + page_size < len(clans) else None,
+            'previous': f'?page={page - 1}' if page > 1 else None,
+            'results': clans[start:start + page_size],
+        }
+
+    def _search(self, query):
+        query = query.lower()
+        return {'results': [clan['clan'] for clan in self.clans
+                            if query in clan['clan']['name'].lower() or query in clan['clan']['tag'].lower()]}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith(API_ROOT):
+            status_code, content_type, body = self.server.recordings.response(
+                self.command, url.path[len(API_ROOT):], url.query)
+            self.respond(status_code, content_type, body)
+        elif url.path in REPLICA_PAGE_PATHS:
+            self.respond_file('index.html')
+        elif url.path.startswith(REPLICA_STATIC_ROOT):
+            self.respond_file(url.path[len(REPLICA_STATIC_ROOT):])
+        else:
+            self.respond(404, 'application/json', {'detail': 'Not found'})
+
+    def respond_file(self, file_name):
+        """ Respond with static file of the leaderboard page replica """
+        path = os.path.normpath(os.path.join(REPLICA_DIR, file_name))
+        if not path.startswith(REPLICA_DIR + os.sep) or not os.path.isfile(path):
+            self.respond(404, 'application/json', {'detail': 'Not found'})
+            return
+        with open(path, 'rb') as static_file:
+            content = static_file.read()
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.respond(200, f'{content_type}; charset=utf-8', content)
+
+    def respond(self, status_code, content_type, body):
+        if isinstance(body, bytes):
+            content = body
+        else:
+            content = (body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def parse_request(self):
+        if len(self.raw_requestline) > MAX_URL_LENGTH:
+            self.requestline = ''
+            self.request_version = 'HTTP/1.1'
+            self.command = ''
+            self.send_error(414)
+            return False
+        return super().parse_request()
+
+    def log_message(self, format, *args):  # requests are logged by Api
+        pass
+
+
+class StandInServer:
+    """ Local in-process http server with replica of the leaderboard page and recorded leaderboard api responses """
+
+    def __init__(self, recordings_dir=RECORDINGS_DIR, host='127.0.0.1', port=0, handler=StandInHandler):
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.server.recordings = Recordings(recordings_dir)
+        self.recordings_dir = recordings_dir
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """
+        Start serving in background thread
+
+        :return: self object
+        """
+        if not self.server.recordings.responses:
+            raise Exception(f'No api recordings in {self.recordings_dir}. Record them first with API_MODE=record')
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        log('Stand-in server started on {url}', url=self.url)
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def setup_api_mode(builder, mode):
+    """
+    Configure api builder for given api mode
+
+    :param builder: ApiBuilder object
+    :param mode: 'live' - requests to BASE_URL, 'record' - store responses, 'replay' - requests to local stand-in
+    :return: started StandInServer object for 'replay' mode, None for other modes
+    """
+    if mode == 'record':
+        builder.recorder = Recorder()
+    elif mode == 'replay':
+        stand_in = StandInServer().start()
+        builder.base_url = f'{stand_in.url}{API_ROOT}'
+        return stand_in
+    return None
+
+
+def record_dataset(directory=RECORDINGS_DIR):
+    """
+    Record complete leaderboard dataset from BASE_URL: seasons, ranked clans (all and per echelon),
+    rewards and search results of every ranked clan
+
+    :param directory: directory for fixture files
+    :return: count of recorded clans
+    """
+    Api.api.recorder = Recorder(directory)
+    api = UIApi()
+    with Api.api.live():
+        api.get_seasons()
+        clans = api.get_clans(size=RANKED_CLANS_COUNT)
+        for echelon_data in echelons_data.values():
+            page_size, page_start, page_stop, _ = parse_echelon_data(echelon_data)
+            api.get_clans(size=page_size, gte=page_start, lte=page_stop)
+        api.get_clans_rewards([clan['clan']['id'] for clan in clans])
+        for clan in clans:
+            api.search_clan(clan['clan']['name'])
+            api.search_clan(clan['clan']['tag'])
+    Api.api.recorder = None
+    return len(clans)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Leaderboard api stand-in')
+    parser.add_argument('command', choices=['record', 'serve'],
+                        help='record - store api responses from BASE_URL, serve - replay recorded responses')
+    parser.add_argument('--recordings', default=RECORDINGS_DIR, help='directory of fixture files')
+    parser.add_argument('--port', type=int, default=8000, help='port of stand-in server')
+    options = parser.parse_args(args)
+
+    if options.command == 'record':
+        print(f'Recorded {record_dataset(options.recordings)} clans into {options.recordings}')
+    else:
+        stand_in = StandInServer(options.recordings, port=options.port)
+        print(f'Serving recorded api on {stand_in.url}{API_ROOT}')
+        try:
+            stand_in.start().thread.join()
+        except KeyboardInterrupt:
+            stand_in.stop()
+
+
+if __name__ == '__main__':
+    main()
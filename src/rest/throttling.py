@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Token bucket: `rate` requests per second on average with bursts up to `burst` requests
+
+    :param rate: tokens added per second
+    :param burst: bucket capacity
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take one token. Token is reserved even when bucket is empty, so callers are served in arrival order
+
+        :return: seconds to wait before sending request. 0 when token is available right now
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class RateLimiter:
+    """
+    Token buckets per endpoint prefix. The longest matching prefix is used, '*' - default bucket
+
+    :param limits: dict object prefix: rate or tuple(rate, burst) ~ {'clans-leaderboard/search/': 2, '*': 10}
+    """
+
+    def __init__(self, limits):
+        self.buckets = {
+            prefix: TokenBucket(*limit) if isinstance(limit, tuple) else TokenBucket(limit)
+            for prefix, limit in limits.items()
+        }
+        self.prefixes = sorted((prefix for prefix in self.buckets if prefix != '*'), key=len, reverse=True)
+
+    @classmethod
+    def from_string(cls, limits):
+        """
+        :param limits: string object ~ '10' or 'clans-leaderboard/search/=2,*=10'
+        :return: RateLimiter object. None for empty string
+        """
+        parsed = {}
+        for item in filter(None, limits.split(',')):
+            prefix, _, rate = item.rpartition('=')
+            parsed[prefix.strip() or '*'] = float(rate)
+        return cls(parsed) if parsed else None
+
+    def reserve(self, path):
+        """
+        :param path: url path relative to api root ~ 'clans-leaderboard/search/?query=abc'
+        :return: seconds to wait before sending request
+        """
+        for prefix in self.prefixes:
+            if path.startswith(prefix):
+                return self.buckets[prefix].reserve()
+        bucket = self.buckets.get('*')
+        return bucket.reserve() if bucket else 0.0
+
+
+class RetryPolicy:
+    """
+    Retry of throttled and failed requests with jittered exponential backoff
+
+    :param retries: max count of retries of one request
+    :param backoff: base delay in seconds, doubled on every attempt
+    :param max_backoff: max delay in seconds, `Retry-After` is limited by it too
+    :param statuses: response status codes to retry
+    """
+
+    def __init__(self, retries=2, backoff=0.5, max_backoff=10, statuses=RETRY_STATUSES):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+
+    def delay(self, attempt, response):
+        """
+        :param attempt: count of already made retries
+        :param response: httpx.Response object
+        :return: seconds to wait before retry. None when request should not be retried
+        """
+        if response.status_code not in self.statuses or attempt >= self.retries:
+            return None
+        retry_after = self.retry_after(response.headers.get('retry-after'))
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))  # full jitter
+
+    @staticmethod
+    def retry_after(value):
+        """
+        :param value: `Retry-After` header value ~ '3' or 'Wed, 21 Oct 2015 07:28:00 GMT'
+        :return: seconds or None for missing/invalid header
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+class ApiStats:
+    """ Counters of retries and rate limiter waits """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.retries = Counter()  # status code: count
+        self.throttle_waits = 0
+        self.throttle_time = 0.0
+
+    def record_retry(self, status_code):
+        with self.lock:
+            self.retries[status_code] += 1
+
+    def record_throttle(self, wait):
+        with self.lock:
+            self.throttle_waits += 1
+            self.throttle_time += wait
+
+    def as_dict(self):
+        return {'retries': dict(self.retries), 'throttle_waits': self.throttle_waits,
+                'throttle_time': self.throttle_time}
+
+    def merge(self, data):
+        """ Add counters of other process ~ from xdist worker """
+        with self.lock:
+            self.retries.update({int(status): count for status, count in data.get('retries', {}).items()})
+            self.throttle_waits += data.get('throttle_waits', 0)
+            self.throttle_time += data.get('throttle_time', 0.0)
+
+    def report(self):
+        """
+        :return: list of report lines
+        """
+        retries = ', '.join(f'{status}: {count}' for status, count in sorted(self.retries.items())) or 'none'
+        return [
+            f'retries: {sum(self.retries.values())} ({retries})',
+            f'rate limiter waits: {self.throttle_waits}, {self.throttle_time:.2f} s total',
+        ]
@@ -1,3 +1,4 @@
+import asyncio
 import random
 import string
 
@@ -30,3 +31,20 @@ def parse_echelon_data(echelon_data):
     places, page_url = echelon_data['places'], echelon_data['url']
     page_size, page_start, page_stop = places.stop - places.start, places.start, places.stop - 1
     return page_size, page_start, page_stop, page_url
+
+
+async def gather_limited(coroutines, limit=8):
+    """
+    Await coroutines concurrently with bounded concurrency
+
+    :param coroutines: iterable of coroutines
+    :param limit: max count of coroutines awaited at once
+    :return: list of results in order of given coroutines
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def limited(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(limited(coroutine) for coroutine in coroutines))
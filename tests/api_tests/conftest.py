@@ -1,7 +1,60 @@
 import pytest
-from src.rest.api import Api
+from src.rest.api import Api, ModelApi
+from src.rest.latency import DEFAULT_REPEAT, LatencyHistory, build_record, check_budgets, measure, parse_budgets
+
+
+def pytest_addoption(parser):
+    parser.addoption('--latency-history', action='store', default='.tox/.tmp/latency_history.jsonl',
+                     help='File with latency results of previous runs')
+    parser.addoption('--run-latency', action='store_true',
+                     help='Run `latency` marked tests: budgets depend on network of the runner, skipped by default')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('run_latency'):
+        return
+    skip_latency = pytest.mark.skip(reason='latency budgets are checked with --run-latency')
+    for item in items:
+        if item.get_closest_marker('latency'):
+            item.add_marker(skip_latency)
 
 
 @pytest.fixture()
 def api():
     return Api()
+
+
+@pytest.fixture()
+def model_api():
+    return ModelApi()
+
+
+@pytest.fixture()
+def latency(request):
+    """
+    Measure latency of api call against budgets of `latency` marker ~ @pytest.mark.latency(p95_ms=300, repeat=20).
+    Results are appended to `--latency-history` file
+    """
+    marker = request.node.get_closest_marker('latency')
+    marker_kwargs = marker.kwargs if marker else {}
+    budgets, repeat = parse_budgets(marker_kwargs), marker_kwargs.get('repeat', DEFAULT_REPEAT)
+    history = LatencyHistory(request.config.getoption('latency_history'))
+
+    def check(call, name=None):
+        """
+        :param call: callable without arguments that sends one request
+        :param name: measurement name in history. Test name by default
+        :return: dict object - measured percentiles
+        """
+        name = name or request.node.name
+        with Api.api.live(direct=True):  # cache, throttle and retries would not be the endpoint latency
+            histogram, failed = measure(call, repeat)
+        record = build_record(name, histogram, budgets, Api.api.base_url)
+        previous = history.last(name)
+        history.append(record)
+        assert not failed, f'Failed requests while measuring "{name}": {failed}'
+        exceeded = check_budgets(record, budgets, previous)
+        assert not exceeded, f'Latency budget of "{name}" exceeded: {", ".join(exceeded)}'
+        return record
+
+    return check
@@ -2,12 +2,20 @@ from random import choice
 
 import pytest
 from src.rest.status_codes import SUCCESS, REQUEST_TOO_LARGE
+from src.rest.schemas import (
+    CLANS_VALIDATOR,
+    CLAN_REWARDS_VALIDATOR,
+    SEARCH_VALIDATOR,
+    SEASONS_VALIDATOR,
+    format_violations,
+)
 from src.data_for_testing.leaderboard_data import RANKED_CLANS_COUNT, all_echelons_types, echelons_data, injections
 from src.utils import parse_echelon_data, random_string
 
 
 class TestApiLeaderboardGeneral:
 
+    @pytest.mark.live_api
     @pytest.mark.parametrize('case', all_echelons_types)
     def test_leaderboard_page_get_echelons(self, api, case):
         page_size, page_start, page_stop, _ = parse_echelon_data(echelons_data[case])
@@ -17,43 +25,43 @@ class TestApiLeaderboardGeneral:
 
 class TestApiLeaderboardClans:
 
-    def test_leaderboard_page_clans_emblems_available(self, api):
-        request = api.get_clans(size=RANKED_CLANS_COUNT).json()['results']
-        for item in [item['clan']['emblems'] for item in request]:
-            assert all((item['small'], item['big']))
+    def test_leaderboard_page_clans_emblems_available(self, model_api):
+        for clan in model_api.get_clans(size=RANKED_CLANS_COUNT):
+            assert all((clan.clan.small_emblem, clan.clan.big_emblem))
 
-    def test_leaderboard_page_clans_ranks_available(self, api):
-        results = api.get_clans(size=RANKED_CLANS_COUNT).json()['results']
-        api_ranks = [item['rank'] for item in results]
+    def test_leaderboard_page_clans_ranks_available(self, model_api):
+        api_ranks = [clan.rank for clan in model_api.get_clans(size=RANKED_CLANS_COUNT)]
         assert sorted(api_ranks) == api_ranks
 
-    def test_leaderboard_page_clans_tags_available(self, api):
-        request = api.get_clans(size=RANKED_CLANS_COUNT).json()['results']
-        api_tags = [item['clan']['tag'] for item in request]
+    def test_leaderboard_page_clans_pages_consistent(self, api):
+        """ Clans walked page by page should be sorted by rank without duplicates on page borders """
+        clans = list(api.iter_clans(lte=RANKED_CLANS_COUNT))
+        api_ranks = [item['rank'] for item in clans]
+        assert sorted(api_ranks) == api_ranks
+        assert len({item['clan']['id'] for item in clans}) == len(clans)
+
+    def test_leaderboard_page_clans_tags_available(self, model_api):
+        api_tags = [clan.clan.tag for clan in model_api.get_clans(size=RANKED_CLANS_COUNT)]
         assert len(list(filter(str, api_tags))) == len(api_tags)
 
-    def test_leaderboard_page_clans_names_available(self, api):
-        request = api.get_clans(size=RANKED_CLANS_COUNT).json()['results']
-        api_clan_names = [item['clan']['name'] for item in request]
+    def test_leaderboard_page_clans_names_available(self, model_api):
+        api_clan_names = [clan.clan.name for clan in model_api.get_clans(size=RANKED_CLANS_COUNT)]
         assert len(list(filter(str, api_clan_names))) == len(api_clan_names)
 
-    def test_leaderboard_page_clans_efficient_available(self, api):
-        request = api.get_clans(size=RANKED_CLANS_COUNT).json()['results']
-        api_efficient = [item['clan_efficient'] for item in request]
+    def test_leaderboard_page_clans_efficient_available(self, model_api):
+        api_efficient = [clan.efficient for clan in model_api.get_clans(size=RANKED_CLANS_COUNT)]
         assert len(list(filter(float, api_efficient))) == len(api_efficient)
 
-    def test_leaderboard_page_clans_sorted_by_points(self, api):
-        results = api.get_clans(size=RANKED_CLANS_COUNT).json()['results']
-        api_points = [item['rewards_count'] for item in results]
+    def test_leaderboard_page_clans_sorted_by_points(self, model_api):
+        api_points = [clan.points for clan in model_api.get_clans(size=RANKED_CLANS_COUNT)]
         assert sorted(api_points, reverse=True) == api_points
 
 
 class TestApiLeaderboardSeasons:
 
-    def test_leaderboard_page_seasons_available(self, api):
+    def test_leaderboard_page_seasons_available(self, model_api):
         """ Gets the available leaderboard seasons """
-        results = api.get_seasons().json()['results']
-        assert len(results)
+        assert len(model_api.get_seasons())
 
 
 class TestApiLeaderboardClanRewards:
@@ -61,52 +69,94 @@ class TestApiLeaderboardClanRewards:
 
     @pytest.mark.xfail(reason='https://github.com/VladimirPodolyan/HTFW/issues/2')
     @pytest.mark.parametrize('case', list(range(1, 4)))
-    def test_leaderboard_page_get_clan_rewards_teams(self, api, case):
+    def test_leaderboard_page_get_clan_rewards_teams(self, model_api, case):
         """ Clan rewards should contain associated team data """
-        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
-        for item in api.get_clan_rewards(random_clan['clan']['id']).json()['teams']:
-            assert item["team"]
+        random_clan = choice(model_api.get_clans(size=RANKED_CLANS_COUNT))
+        for team in model_api.get_clan_rewards(random_clan.clan.id).teams:
+            assert team.title is not None
 
-    def test_leaderboard_page_get_clan_rewards_team_id(self, api):
+    def test_leaderboard_page_get_clan_rewards_team_id(self, model_api):
         """ Each team should contain team_id """
-        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
-        teams_ids = [item['team_id'] for item in api.get_clan_rewards(random_clan['clan']['id']).json()['teams']]
+        random_clan = choice(model_api.get_clans(size=RANKED_CLANS_COUNT))
+        teams_ids = [team.team_id for team in model_api.get_clan_rewards(random_clan.clan.id).teams]
         assert len(list(filter(int, teams_ids))) == len(teams_ids)
 
-    def test_leaderboard_page_get_clan_team_efficient(self, api):
+    def test_leaderboard_page_get_clan_team_efficient(self, model_api):
         """ Each team should contain efficient """
-        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
-        rewards = api.get_clan_rewards(random_clan['clan']['id']).json()['teams']
-        teams_efficient = [item['team_efficient'] for item in rewards]
+        random_clan = choice(model_api.get_clans(size=RANKED_CLANS_COUNT))
+        teams_efficient = [team.efficient for team in model_api.get_clan_rewards(random_clan.clan.id).teams]
         assert len(list(filter(float, teams_efficient))) == len(teams_efficient)
 
-    def test_leaderboard_page_get_clan_team_points(self, api):
+    def test_leaderboard_page_get_clan_team_points(self, model_api):
         """ Each team should contain rewarded points """
-        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
-        rewards = api.get_clan_rewards(random_clan['clan']['id']).json()['teams']
-        assert len([team_points['rewards'] for team_points in rewards]) == len(rewards)
+        random_clan = choice(model_api.get_clans(size=RANKED_CLANS_COUNT))
+        teams = model_api.get_clan_rewards(random_clan.clan.id).teams
+        assert all(team.points is not None for team in teams)
 
-    def test_leaderboard_page_get_clan_rewards_updated_date(self, api):
+    def test_leaderboard_page_get_clan_rewards_updated_date(self, model_api):
         """ Each reward should contain date info """
-        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
-        teams_ids = [item['updated_at'] for item in api.get_clan_rewards(random_clan['clan']['id']).json()['teams']]
-        assert len(list(filter(str, teams_ids))) == len(teams_ids)
+        random_clan = choice(model_api.get_clans(size=RANKED_CLANS_COUNT))
+        updated_dates = [team.updated_at for team in model_api.get_clan_rewards(random_clan.clan.id).teams]
+        assert len(list(filter(str, updated_dates))) == len(updated_dates)
 
-    def test_leaderboard_page_get_clan_rewards_team_status(self, api):
+    def test_leaderboard_page_get_clan_rewards_team_status(self, model_api):
         """ Each reward should contain team status info """
+        random_clan = choice(model_api.get_clans(size=RANKED_CLANS_COUNT))
+        teams = model_api.get_clan_rewards(random_clan.clan.id).teams
+        assert all(team.used is not None for team in teams)
+
+
+class TestApiLeaderboardSchemas:
+    """ Every field of every record validated by a single request per endpoint """
+
+    def test_leaderboard_page_clans_schema(self, api):
+        violations = CLANS_VALIDATOR.validate_response(api.get_clans(size=RANKED_CLANS_COUNT))
+        assert not violations, format_violations(violations)
+
+    def test_leaderboard_page_clan_rewards_schema(self, api):
         random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
-        rewards = api.get_clan_rewards(random_clan['clan']['id']).json()['teams']
-        assert len([team_status['used'] for team_status in rewards]) == len(rewards)
+        violations = CLAN_REWARDS_VALIDATOR.validate_response(api.get_clan_rewards(random_clan['clan']['id']))
+        assert not violations, format_violations(violations)
+
+    def test_leaderboard_page_seasons_schema(self, api):
+        violations = SEASONS_VALIDATOR.validate_response(api.get_seasons())
+        assert not violations, format_violations(violations)
+
+    def test_leaderboard_page_search_clan_schema(self, api):
+        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
+        violations = SEARCH_VALIDATOR.validate_response(api.search_clan(random_clan['clan']['tag']))
+        assert not violations, format_violations(violations)
+
+
+class TestApiLeaderboardLatency:
+
+    @pytest.mark.latency(p50_ms=500, p95_ms=1000)
+    def test_leaderboard_page_clans_latency(self, api, latency):
+        latency(lambda: api.get_clans(size=RANKED_CLANS_COUNT), name='get_clans')
+
+    @pytest.mark.latency(p50_ms=500, p95_ms=1000)
+    def test_leaderboard_page_clan_rewards_latency(self, api, latency):
+        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
+        latency(lambda: api.get_clan_rewards(random_clan['clan']['id']), name='get_clan_rewards')
+
+    @pytest.mark.latency(p50_ms=500, p95_ms=1000)
+    def test_leaderboard_page_search_clan_latency(self, api, latency):
+        random_clan = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])
+        latency(lambda: api.search_clan(random_clan['clan']['tag']), name='search_clan')
+
+    @pytest.mark.latency(p50_ms=500, p95_ms=1000)
+    def test_leaderboard_page_seasons_latency(self, api, latency):
+        latency(api.get_seasons, name='get_seasons')
 
 
 class TestApiLeaderboardSearchInput:
 
     @pytest.mark.xfail(reason='Flaky test: https://github.com/VladimirPodolyan/HTFW/issues/8')
     @pytest.mark.parametrize('case', ['name', 'tag'])
-    def test_leaderboard_page_search_clan(self, api, case):
+    def test_leaderboard_page_search_clan(self, model_api, case):
         """ Check search response for random clan name/tag """
-        clan_pattern = choice(api.get_clans(size=RANKED_CLANS_COUNT).json()['results'])['clan'][case]
-        assert clan_pattern in [item[case] for item in api.search_clan(clan_pattern).json()['results']]
+        clan_pattern = getattr(choice(model_api.get_clans(size=RANKED_CLANS_COUNT)).clan, case)
+        assert clan_pattern in [getattr(clan, case) for clan in model_api.search_clan(clan_pattern)]
 
     def test_leaderboard_page_search_clan_large_input(self, api):
         """ Check search response for random clan name/tag """
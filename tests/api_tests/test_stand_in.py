@@ -0,0 +1,60 @@
+import httpx
+import pytest
+from src.rest.stand_in import API_ROOT, Recorder, Recordings, StandInServer, request_key
+from src.rest.status_codes import SUCCESS
+
+CLANS_PATH = 'clans-leaderboard/tournamentCupX/'
+
+
+@pytest.fixture(scope='module')
+def recordings():
+    """ Committed recordings of the offline suites """
+    return Recordings()
+
+
+class TestStandInRecordings:
+
+    def test_request_key_sorts_query(self):
+        assert request_key('get', CLANS_PATH, 'page_size=8&page=1') == f'GET {CLANS_PATH}?page=1&page_size=8'
+
+    def test_recorded_response_replayed(self, tmp_path):
+        """ Response stored by Recorder should be replayed for the same request with any order of query """
+        request = httpx.Request('GET', f'https://example.com{API_ROOT}{CLANS_PATH}?page=1&page_size=8')
+        body = {'count': 1, 'next': None, 'previous': None, 'results': []}
+        Recorder(str(tmp_path)).record('GET', httpx.Response(SUCCESS, json=body, request=request))
+        assert Recordings(str(tmp_path)).response('GET', CLANS_PATH, 'page_size=8&page=1') == (
+            SUCCESS, 'application/json', body)
+
+    def test_not_recorded_response(self, recordings):
+        status_code, _, body = recordings.response('GET', 'tournaments/unknown/', '')
+        assert status_code == 404 and 'Not recorded' in body['detail']
+
+    def test_clans_pages_emulated(self, recordings):
+        """ Not recorded clans pages should be cut from recorded clans by rank range and page """
+        gte, lte, page_size = 3, 20, 5
+        pages = [recordings.response('GET', CLANS_PATH, f'page={page}&page_size={page_size}&rank__gte={gte}'
+                                                       f'&rank__lte={lte}')[2] for page in range(1, 5)]
+        assert [page['count'] for page in pages] == [lte - gte + 1] * 4
+        assert [clan['rank'] for page in pages for clan in page['results']] == list(range(gte, lte + 1))
+        assert (pages[0]['previous'], pages[-1]['next']) == (None, None)
+        assert all(page['next'] for page in pages[:-1])
+
+    def test_search_emulated(self, recordings):
+        """ Not recorded search should find clans by a part of name or tag, case insensitive """
+        clan = recordings.clans[-1]['clan']
+        for query in (clan['tag'].lower(), clan['name'].upper()):
+            status_code, _, body = recordings.response('GET', 'clans-leaderboard/search/', f'query={query}')
+            assert status_code == SUCCESS
+            assert clan in body['results']
+
+
+class TestStandInServer:
+
+    def test_recorded_response_served(self, recordings):
+        stand_in = StandInServer().start()
+        try:
+            response = httpx.get(f'{stand_in.url}{API_ROOT}tournaments/seasons/')
+        finally:
+            stand_in.stop()
+        assert response.status_code == SUCCESS
+        assert response.json() == recordings.responses[request_key('GET', 'tournaments/seasons/')]['body']
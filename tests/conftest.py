@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from framework.logger import LOG_LEVEL, framework_logger
+from src.rest.api import Api, DiskCacheBackend, ResponseCache, API_MODE, API_RETRIES
+from src.rest.throttling import RetryPolicy
+from src.rest.stand_in import setup_api_mode
+
+
+def pytest_addoption(parser):
+    parser.addoption('--api-cache-ttl', action='store', type=float, default=60,
+                     help='Seconds while api responses are reused from cache. 0 - disable cache')
+    parser.addoption('--api-retries', action='store', type=int, default=API_RETRIES,
+                     help='Retries of 429/5xx api responses, 0 - disabled. `API_RETRIES` env variable by default')
+    parser.addoption('--framework-log-level', action='store', default=None,
+                     help='Level of framework logs: DEBUG, INFO, WARNING. `HTFW_LOG_LEVEL` environment variable by default')
+    parser.addoption('--framework-log-dir', action='store', default=None,
+                     help='Directory for json log files, one file per xdist worker')
+    parser.addoption('--allure-log-steps', action='store_true', help='Add framework log events as allure steps')
+
+
+def setup_framework_logging(config):
+    """ Framework log level, per worker log file and allure steps from command line options """
+    log_dir = config.getoption('framework_log_dir')
+    log_file = os.path.join(log_dir, f'{os.environ.get("PYTEST_XDIST_WORKER", "main")}.log') if log_dir else None
+    framework_logger.setup(level=config.getoption('framework_log_level') or LOG_LEVEL, log_file=log_file,
+                           json_file=True)
+    if config.getoption('allure_log_steps'):
+        framework_logger.route_to_allure()
+
+
+def pytest_configure(config):
+    setup_framework_logging(config)
+    retries = config.getoption('api_retries')
+    Api.api.retry = RetryPolicy(retries=retries) if retries else None
+
+
+def pytest_sessionfinish(session):
+    if hasattr(session.config, 'workerinput'):  # xdist worker: send api stats to controller
+        session.config.workeroutput['api_stats'] = Api.api.stats.as_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    Api.api.stats.merge(getattr(node, 'workeroutput', {}).get('api_stats', {}))
+
+
+def pytest_terminal_summary(terminalreporter):
+    terminalreporter.write_sep('-', 'api retries and throttling')
+    for line in Api.api.stats.report():
+        terminalreporter.write_line(line)
+
+
+@pytest.fixture(scope='session')
+def api_mode():
+    """ Mode of the api client, see src.rest.stand_in.setup_api_mode """
+    return API_MODE
+
+
+@pytest.fixture(scope='session', autouse=True)
+def api_client(request, api_mode):
+    """ Pooled api client lifecycle. Responses cache directory is shared between workers """
+    cache_ttl = request.config.getoption('api_cache_ttl')
+    if cache_ttl and getattr(request.config, 'cache', None):  # cache directory requires cacheprovider plugin
+        cache_directory = str(request.config.cache.makedir('api_responses'))
+        Api.api.cache = ResponseCache(DiskCacheBackend(cache_directory), ttl=cache_ttl)
+    stand_in = setup_api_mode(Api.api, api_mode)
+    yield Api.api
+    Api.api.cache = None
+    Api.api.close()
+    if stand_in:
+        stand_in.stop()
+
+
+@pytest.fixture(autouse=True)
+def live_api(request):
+    """ Tests marked with `live_api` bypass responses cache """
+    if request.node.get_closest_marker('live_api'):
+        with Api.api.live():
+            yield
+    else:
+        yield
@@ -1,20 +1,85 @@
 import logging
+import os
+import re
+from urllib.parse import urlsplit
 
 import pytest
 import allure
 from allure_commons.types import AttachmentType
 from selenium.webdriver.chrome.options import Options as ChromeOptions
 from selenium.webdriver.chrome.webdriver import WebDriver as ChromeWebDriver
-from framework.web_driver import WebDriver
+from framework.cdp import CdpDriver
+from framework.driver_pool import DriverPool
+from framework.network import install_network_tracker
+from framework.runner import ThreadRunner
+from framework.tabs import TabGroup
+from framework.tracer import instrument_driver, tracer
+from framework.waits import WAIT_PROFILES, set_wait_profile, wait_stats
 
-from src.rest.api import UIApi
+from src.rest.api import ModelApi, UIApi, API_MODE
+from src.rest.stand_in import StandInServer
+from src.data_for_testing.general_data import BASE_URL
+from src.data_for_testing.leaderboard_data import RANKED_CLANS_COUNT
+
+REMOVED_IMPLICIT_WAIT = 5  # seconds, implicit wait used before waits became explicit only
+LOCAL_HOSTS = ('127.0.0.1', 'localhost')  # stand-in hosts of API_MODE=replay
 
 
 def pytest_addoption(parser):
     parser.addoption('--headless', action='store_true', help='Run in headless mode')
-
-
-@pytest.fixture
+    parser.addoption('--recycle-after', action='store', type=int, default=20,
+                     help='Restart browser session after N tests. 0 - never restart by tests count')
+    parser.addoption('--keep-failed-sessions', action='store_true',
+                     help='Reuse browser session after failed test instead of restarting it')
+    parser.addoption('--wait-profile', action='store', default='default', choices=list(WAIT_PROFILES),
+                     help='Timeout and polling profile of explicit waits')
+    parser.addoption('--wait-timeout', action='store', type=float, default=None,
+                     help='Override timeout of selected wait profile')
+    parser.addoption('--trace-commands', action='store_true',
+                     help='Trace driver commands, waits and framework calls of every test, attach summary to allure')
+    parser.addoption('--trace-dir', action='store', default=None,
+                     help='Directory for json traces of tests. Enables tracing')
+    parser.addoption('--driver-backend', action='store', default='selenium', choices=['selenium', 'cdp'],
+                     help='Browser driver: selenium over chromedriver or DevTools protocol websocket')
+    parser.addoption('--threads', action='store', type=int, default=4,
+                     help='Browsers driven concurrently by `thread_runner` fixture on threads of one process')
+
+
+def pytest_configure(config):
+    set_wait_profile(config.getoption('wait_profile'), timeout=config.getoption('wait_timeout'))
+    if API_MODE == 'replay' and not hasattr(config, 'workerinput'):  # one stand-in for all xdist workers
+        base_url = urlsplit(BASE_URL)
+        if base_url.scheme != 'http' or base_url.hostname not in LOCAL_HOSTS or not base_url.port:
+            raise pytest.UsageError(
+                f'API_MODE=replay serves pages by local stand-in on BASE_URL, it should be http://127.0.0.1:<port> '
+                f'~ http://127.0.0.1:8765 as in py39-ui-offline. Got: {BASE_URL}')
+        config.stand_in = StandInServer(host=base_url.hostname, port=base_url.port).start()
+
+
+def pytest_unconfigure(config):
+    stand_in = getattr(config, 'stand_in', None)
+    if stand_in:
+        stand_in.stop()
+
+
+def pytest_sessionfinish(session):
+    if hasattr(session.config, 'workerinput'):  # xdist worker: send wait timings to controller
+        session.config.workeroutput['wait_stats'] = wait_stats.as_dict()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    workeroutput = getattr(node, 'workeroutput', {})
+    wait_stats.merge(workeroutput.get('wait_stats', {}))
+
+
+def pytest_terminal_summary(terminalreporter):
+    terminalreporter.write_sep('-', 'wait timings')
+    for line in wait_stats.report(removed_implicit_wait=REMOVED_IMPLICIT_WAIT):
+        terminalreporter.write_line(line)
+
+
+@pytest.fixture(scope='session')
 def chrome_options(request):
     options = ChromeOptions()
     if request.config.getoption('headless'):
@@ -28,22 +93,86 @@ def chrome_options(request):
     return options
 
 
-@pytest.fixture(autouse=True)
-def driver(chrome_options, request):
-    """ Driver instance setup """
+@pytest.fixture(scope='session')
+def driver_pool(chrome_options, request):
+    """ Per worker pool of warm browser sessions """
     logging.getLogger("urllib3").setLevel(logging.ERROR)
 
-    web_driver = WebDriver(driver=ChromeWebDriver(options=chrome_options))
-    web_driver.driver.implicitly_wait(5)
-    web_driver.driver.set_window_size(1200, 1200)
-    web_driver.driver.set_window_position(0, 0)
+    if request.config.getoption('driver_backend') == 'cdp':
+        def start_driver():
+            return CdpDriver.launch(headless=chrome_options.headless, arguments=chrome_options.arguments)
+    else:
+        def start_driver():
+            return ChromeWebDriver(options=chrome_options)
+
+    pool = DriverPool(
+        driver_factory=lambda: instrument_driver(install_network_tracker(start_driver())),
+        recycle_after=request.config.getoption('recycle_after'),
+        recycle_on_failure=not request.config.getoption('keep_failed_sessions'),
+    )
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope='session')
+def thread_runner(driver_pool, request):
+    """ Runs independent scenarios on threads, each with its own browser from the worker pool """
+    return ThreadRunner(driver_pool, workers=request.config.getoption('threads'))
+
+
+@pytest.fixture(scope='session')
+def api_mode():
+    """ Replayed page and api share the stand-in started in pytest_configure """
+    return 'record' if API_MODE == 'record' else 'live'
+
+
+@pytest.fixture(scope='session')
+def ranked_clans():
+    """ All ranked clans data, fetched once per worker """
+    return ModelApi().get_clans(size=RANKED_CLANS_COUNT)
+
+
+@pytest.fixture(autouse=True)
+def command_trace(request):
+    """ Per-test trace of driver commands, explicit waits and framework calls """
+    trace_dir = request.config.getoption('trace_dir')
+    if not (request.config.getoption('trace_commands') or trace_dir):
+        yield None
+        return
+
+    tracer.start(request.node.nodeid)
+    yield tracer
+    tracer.stop()
+    allure.attach('\n'.join(tracer.summary()), name='Command trace', attachment_type=AttachmentType.TEXT)
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+        file_name = re.sub(r'[^\w.-]+', '_', request.node.nodeid)
+        tracer.dump(os.path.join(trace_dir, f'{file_name}.json'))
+
+
+@pytest.fixture(autouse=True)
+def driver(driver_pool, command_trace, request):
+    """ Driver instance setup """
+    web_driver = driver_pool.acquire()
     request.node.uiapi = UIApi()
     request.node.node_driver = web_driver
 
     all_pytest_markers = [marker.name for marker in request.node.own_markers]
     yield web_driver
-    if 'no_teardown' not in all_pytest_markers:
-        web_driver.driver.quit()
+    reports = (getattr(request.node, f'rep_{when}', None) for when in ('setup', 'call'))
+    driver_pool.release(
+        web_driver,
+        failed=any(report.failed for report in reports if report),
+        keep_open='no_teardown' in all_pytest_markers,
+    )
+
+
+@pytest.fixture
+def tab_group(driver):
+    """ Tabs of the test browser session. Extra tabs are closed after test """
+    group = TabGroup(driver)
+    yield group
+    group.close()
 
 
 @pytest.hookimpl(hookwrapper=True)
@@ -59,6 +188,7 @@ def pytest_runtest_makereport(item, call):
     """
     outcome = yield
     result = outcome.get_result()
+    setattr(item, f'rep_{result.when}', result)  # test outcome for driver pool recycling
     driver = getattr(item, 'node_driver', None)
     xfail = hasattr(result, 'wasxfail')
     failure = (result.skipped and xfail) or (result.failed and not xfail)
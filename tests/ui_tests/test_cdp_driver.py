@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import trio
+from trio_websocket import serve_websocket
+
+from framework.cdp import CdpConnection, CdpDriver
+from framework.tabs import TabGroup
+
+LOAD_DELAY = 0.2  # seconds between navigation response and load event of the new document
+
+
+class FakeDevTools:
+    """
+    DevTools websocket endpoint of a browser with one tab. Every command is answered by its own task,
+    so replies of delayed commands (`delay` param) come out of order
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.replies = []
+        self.targets = 1
+        self.port = None
+        self.trio_token = None
+        self.cancel_scope = None
+        self.started = threading.Event()
+        self.thread = threading.Thread(target=trio.run, args=(self._serve,), daemon=True)
+
+    @property
+    def url(self):
+        return f'ws://127.0.0.1:{self.port}/devtools/browser/fake'
+
+    def start(self):
+        self.thread.start()
+        self.started.wait(5)
+        return self
+
+    def stop(self):
+        trio.from_thread.run_sync(self.cancel_scope.cancel, trio_token=self.trio_token)
+        self.thread.join(5)
+
+    def sent(self, method, session_id=None):
+        """ Received commands of method, optionally of one tab session """
+        return [message for message in self.messages
+                if message['method'] == method and (session_id is None or message.get('sessionId') == session_id)]
+
+    async def _serve(self):
+        self.trio_token = trio.lowlevel.current_trio_token()
+        async with trio.open_nursery() as nursery:
+            self.cancel_scope = nursery.cancel_scope
+            listener = await nursery.start(serve_websocket, self._handle, '127.0.0.1', 0, None)
+            self.port = listener.port
+            self.started.set()
+
+    async def _handle(self, request):
+        websocket = await request.accept()
+        async with trio.open_nursery() as nursery:
+            while True:
+                try:
+                    message = json.loads(await websocket.get_message())
+                except Exception:  # connection closed by client
+                    nursery.cancel_scope.cancel()
+                    return
+                self.messages.append(message)
+                nursery.start_soon(self._reply, websocket, message)
+
+    async def _event(self, websocket, method, params, session_id=None):
+        await websocket.send_message(json.dumps({'method': method, 'params': params, 'sessionId': session_id}))
+
+    async def _reply(self, websocket, message):
+        method, params, session_id = message['method'], message['params'], message.get('sessionId')
+        await trio.sleep(params.get('delay', 0))
+        result = {}
+        if method == 'Target.getTargets':
+            result = {'targetInfos': [{'targetId': 'T1', 'type': 'page'}, {'targetId': 'B', 'type': 'browser'}]}
+        elif method == 'Target.attachToTarget':
+            result = {'sessionId': f'S-{params["targetId"]}'}
+        elif method == 'Target.createTarget':
+            self.targets += 1
+            result = {'targetId': f'T{self.targets}'}
+            await self._event(websocket, 'Target.targetCreated', {'targetInfo': {**result, 'type': 'page'}})
+        elif method == 'Target.closeTarget':
+            await self._event(websocket, 'Target.targetDestroyed', {'targetId': params['targetId']})
+        elif method == 'Runtime.evaluate' and 'querySelector' in params['expression']:
+            result = {'result': {'type': 'object', 'subtype': 'node', 'objectId': f'E-{session_id}'}}
+        elif method == 'Runtime.evaluate':
+            result = {'result': {'type': 'string', 'value': params['expression']}}
+        elif method == 'Runtime.callFunctionOn':  # value tells which tab session received the element call
+            result = {'result': {'type': 'string', 'value': f'{params["objectId"]}@{session_id}'}}
+        elif method == 'Page.navigate':
+            result = {'frameId': 'F'} if '#' in params['url'] else {'frameId': 'F', 'loaderId': 'L'}
+
+        self.replies.append(message['id'])
+        await websocket.send_message(json.dumps({'id': message['id'], 'result': result}))
+        if method == 'Page.navigate' and 'loaderId' in result:
+            await trio.sleep(LOAD_DELAY)
+            await self._event(websocket, 'Page.loadEventFired', {}, session_id)
+
+
+@pytest.fixture
+def driver():
+    """ DevTools backend is checked against fake endpoint, browser session is not needed """
+    return None
+
+
+@pytest.fixture
+def devtools():
+    server = FakeDevTools().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def cdp_driver(devtools):
+    cdp_driver = CdpDriver(CdpConnection(devtools.url, timeout=2))
+    yield cdp_driver
+    cdp_driver.connection.close()
+
+
+class TestCdpDriver:
+
+    def test_driver_attached_to_page_target(self, cdp_driver, devtools):
+        assert (cdp_driver.window_handles, cdp_driver.session_id) == (['T1'], 'S-T1')
+        assert devtools.sent('Page.enable', 'S-T1') and devtools.sent('Runtime.enable', 'S-T1')
+
+    def test_pipelined_responses_matched_by_id(self, cdp_driver, devtools):
+        """ Replies of pipelined commands arrive in reverse order and should be returned in order of commands """
+        delays = (0.3, 0.2, 0.1)
+        results = cdp_driver.execute_pipeline(
+            [('Runtime.evaluate', {'expression': str(index), 'delay': delay}) for index, delay in enumerate(delays)])
+        assert [result['result']['value'] for result in results] == ['0', '1', '2']
+        sent_ids = [message['id'] for message in devtools.sent('Runtime.evaluate')]
+        assert devtools.replies[-len(delays):] == sent_ids[::-1]
+
+    def test_navigation_waits_for_load_event(self, cdp_driver):
+        start_time = time.perf_counter()
+        cdp_driver.get('http://stand-in/ru/clans-leaderboard/')
+        assert time.perf_counter() - start_time >= LOAD_DELAY
+
+    def test_same_document_navigation_without_load_event(self, cdp_driver, devtools):
+        """ Fragment navigation has no loader and load event, it should not wait for connection timeout """
+        start_time = time.perf_counter()
+        cdp_driver.get('http://stand-in/ru/clans-leaderboard/#/leagues/2')
+        assert time.perf_counter() - start_time < cdp_driver.connection.timeout
+        assert devtools.sent('Page.navigate', 'S-T1')
+
+    def test_new_tab_switched_and_closed(self, cdp_driver, devtools):
+        """ New tab gets init scripts once, closed tab disappears from handles, known tab is not attached again """
+        script = {'source': 'window.htfwTracker = true;'}
+        cdp_driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', script)
+        cdp_driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', script)
+        assert len(devtools.sent('Page.addScriptToEvaluateOnNewDocument', 'S-T1')) == 1
+
+        cdp_driver.switch_to.new_window('tab')
+        assert (cdp_driver.window_handles, cdp_driver.current_window_handle) == (['T1', 'T2'], 'T2')
+        tab_commands = [message['method'] for message in devtools.messages if message.get('sessionId') == 'S-T2']
+        assert tab_commands == ['Page.enable', 'Runtime.enable', 'Page.addScriptToEvaluateOnNewDocument']
+
+        cdp_driver.close()
+        with cdp_driver.targets_changed:
+            assert cdp_driver.targets_changed.wait_for(lambda: cdp_driver.targets == ['T1'], 2)
+        cdp_driver.switch_to.window('T1')
+        assert cdp_driver.session_id == 'S-T1'
+        assert len(devtools.sent('Target.attachToTarget')) == 2
+
+
+class TestCdpTabs:
+
+    def test_tab_elements_routed_to_own_tab(self, cdp_driver):
+        """ Elements found in a tab should send their commands to that tab, not to the last activated one """
+        first_tab, second_tab = TabGroup(SimpleNamespace(driver=cdp_driver)).open(2)
+        elements = [tab.find_element('css selector', '.clan') for tab in (first_tab, second_tab)]
+        assert [element.text for element in reversed(elements)] == ['E-S-T2@S-T2', 'E-S-T1@S-T1']
+
+    def test_tab_group_run(self, cdp_driver):
+        group = TabGroup(SimpleNamespace(driver=cdp_driver))
+        results = group.run(lambda tab, param: tab.find_element('css selector', param).text, ['.clan', '.team'])
+        assert group.raise_failures(results) == ['E-S-T1@S-T1', 'E-S-T2@S-T2']
@@ -4,6 +4,9 @@ import pytest
 from hamcrest import assert_that, equal_to
 
 from src.utils import random_string, parse_echelon_data
+from src.rest.api import ModelApi
+from src.rest.models import ClanRank
+from src.leaderboard_diff import compare_table_with_api, format_diff
 from src.page_object.components.social_block import SocialBlock
 from src.data_for_testing.leaderboard_data import (
     DEFAULT_PAGE_SIZE,
@@ -17,6 +20,7 @@ from src.data_for_testing.leaderboard_data import (
 from src.page_object.pages.leaderboard_page import (
     LeaderboardPage,
     LeaderboardTable,
+    get_clan_info,
     get_leader_info,
     Carousel,
 )
@@ -41,11 +45,11 @@ def random_echelon():
 
 
 @pytest.fixture(params=echelons_data, ids=all_echelons_types)
-def all_echelons_regular_clan_data(request):
+def all_echelons_regular_clan_data(request, ranked_clans):
     """ All echelons with random clan data """
     size, start, stop, url = parse_echelon_data(echelons_data[request.param])
-    clan_data = choice(request.node.uiapi.get_clans(size=size, gte=start, lte=stop))
-    team_data = request.node.uiapi.get_clan_rewards(clan_data['clan']['id'])
+    clan_data = choice([clan for clan in ranked_clans if start <= clan.rank <= stop])
+    team_data = ModelApi().get_clan_rewards(clan_data.clan.id)
     return get_leader_info(clan_data=clan_data, team_data=team_data, url=url, page_start=start)
 
 
@@ -58,6 +62,17 @@ def all_echelons_pages_with_clan_data(all_echelons_regular_clan_data):
     return page
 
 
+@pytest.fixture(params=echelons_data, ids=all_echelons_types)
+def all_echelons_tables(request, ranked_clans):
+    """ All echelons pages with fully loaded table and api clans data of echelon """
+    size, start, stop, url = parse_echelon_data(echelons_data[request.param])
+    page = LeaderboardPage().open_page(url=url)
+    if size > DEFAULT_PAGE_SIZE:  # Load all rows
+        page.table.scroll_to_table()
+    echelon_clans = [clan for clan in ranked_clans if start <= clan.rank <= stop]
+    return echelon_clans, page.table.snapshot(), start
+
+
 class TestLeaderboardPage:
 
     @pytest.mark.parametrize('action', ['accept', 'decline'])
@@ -73,6 +88,15 @@ class TestLeaderboardPage:
         echelon_with_title = leaderboard_page.carousel.echelon_with_title(echelons_data['platinum']['title'])
         assert echelon_with_title.wait_element().is_displayed()
 
+    def test_echelons_opened_by_url(self, thread_runner):
+        """ Every echelon url should open page with its echelon selected. Echelons are checked concurrently """
+        def echelon_selected(web_driver, echelon_type):
+            page = LeaderboardPage().open_page(url=echelons_data[echelon_type]['url'])
+            return page.carousel.echelon_with_title(echelons_data[echelon_type]['title']).wait_element().is_displayed()
+
+        results = thread_runner.map(echelon_selected, all_echelons_types)
+        assert all(thread_runner.raise_failures(results))
+
     @pytest.mark.xfail(reason='https://github.com/VladimirPodolyan/HTFW/issues/1')
     def test_leaderboard_switch_season(self, leaderboard_page, request):
         """ Switch season and check echelon with title """
@@ -160,42 +184,68 @@ class TestLeaderboardCarousel:
             echelons_carousel.select_echelon(prev_echelon=True)
             assert echelons_carousel.echelon_with_title(echelons_data[item]['title']).is_displayed()
 
+    def test_echelons_switched_by_route(self, leaderboard_page):
+        """ Echelon url opened on the loaded page should switch route without page reload and show own table """
+        leaderboard_page.driver.execute_script('window.htfwDocument = true;')  # lost on page reload
+        for echelon_type in all_echelons_types:
+            size, start, stop, url = parse_echelon_data(echelons_data[echelon_type])
+            page = leaderboard_page.open_page(url=url)
+            assert page.driver.execute_script('return window.htfwDocument === true;'), 'Page was reloaded'
+            assert page.carousel.echelon_with_title(echelons_data[echelon_type]['title']).wait_element().is_displayed()
+            assert page.table.get_clan_rank_by_row_id(1) == start
+
 
 class TestLeaderboardTable:
     # Table sorting covered in api tests
 
-    def test_table_clan_info(self, all_echelons_regular_clan_data, all_echelons_pages_with_clan_data):
+    def test_table_clan_info(self, all_echelons_tables):
         """
-        Clan info (rank/icon/tag/name/efficient/points) in the table
+        Clan info (rank/tag/name/efficient/points) of every table row
         should be visible and accurate the api info
         """
-        row_id = all_echelons_regular_clan_data['row_id']
-        clan_data = all_echelons_regular_clan_data['leader_info']['clan']
-        page_table = all_echelons_pages_with_clan_data.table
-        assert_that(
-            (
-                clan_data['rank'],
-                clan_data['title'],
-                clan_data['efficient'],
-                clan_data['points']
-            ),
-            equal_to(
-                (
-                    page_table.get_clan_rank_by_row_id(row_id),
-                    page_table.get_clan_title_by_row_id(row_id),
-                    page_table.get_clan_efficient_by_row_id(row_id),
-                    page_table.get_clan_points_by_row_id(row_id),
-                )))
+        echelon_clans, table_rows, page_start = all_echelons_tables
+        diffs = compare_table_with_api(echelon_clans, table_rows, page_start=page_start)
+        assert not diffs, f'Table is not accurate the api info:\n{format_diff(diffs)}'
+
+    def test_echelon_pages_in_tabs(self, tab_group):
+        """ Echelon pages opened in tabs of one browser should keep own selected echelon and table """
+        urls = [echelons_data[echelon_type]['url'] for echelon_type in all_echelons_types]
+        pages = tab_group.open_pages(LeaderboardPage, urls)
+        for (tab, page), echelon_type in zip(pages, all_echelons_types):
+            with tab_group.bound(tab):
+                page.wait_page_table_loaded()
+                echelon_with_title = page.carousel.echelon_with_title(echelons_data[echelon_type]['title'])
+                assert echelon_with_title.wait_element().is_displayed()
+                assert page.table.all_rows.wait_element().get_elements_count()
+
+    def test_echelon_tables_checked_in_tabs(self, tab_group, ranked_clans):
+        """
+        First page rows of every echelon, checked concurrently in tabs of one browser,
+        should be accurate the api info
+        """
+        def first_page_diffs(tab, echelon_type):
+            size, start, stop, url = parse_echelon_data(echelons_data[echelon_type])
+            page = LeaderboardPage().open_page(url=url).wait_page_table_loaded()
+            table_rows = page.table.snapshot()
+            echelon_clans = [clan for clan in ranked_clans if start <= clan.rank < start + len(table_rows)]
+            return compare_table_with_api(echelon_clans, table_rows, page_start=start)
+
+        results = tab_group.run(first_page_diffs, all_echelons_types)
+        diffs = {result.name: value for result, value in zip(results, tab_group.raise_failures(results)) if value}
+        assert not diffs, '\n'.join(f'{name}:\n{format_diff(echelon_diffs)}' for name, echelon_diffs in diffs.items())
 
 
 class TestLeaderboardClanPopup:
 
     @pytest.fixture
-    def clan_data_with_rewards(self, request):
+    def clan_data_with_rewards(self, request, ranked_clans):
         """ Clan with large count of rewards collection """
         size, start, stop, url = parse_echelon_data(echelons_data[choice(all_echelons_types)])
-        clan_data = choice(request.node.uiapi.get_clans_with_rewards(more_than=6, size=size, gte=start, lte=stop))
-        team_data = request.node.uiapi.get_clan_rewards(clan_data['clan']['id'])
+        echelon_clans = [clan for clan in ranked_clans if start <= clan.rank <= stop]
+        clans_rewards = request.node.uiapi.get_clans_rewards([clan.clan.id for clan in echelon_clans])
+        clan_data, rewards = choice([(clan, rewards) for clan, rewards in zip(echelon_clans, clans_rewards)
+                                     if len(rewards['teams']) > 6])
+        team_data = ClanRank.from_dict(rewards)  # already fetched rewards, decoded like ModelApi.get_clan_rewards
         return get_leader_info(clan_data=clan_data, team_data=team_data, url=url, page_start=start)
 
     @pytest.fixture
@@ -236,25 +286,27 @@ class TestLeaderboardClanPopup:
             )
         )
 
-    def test_clan_popup_header(self, all_echelons_regular_clan_data, all_echelons_pages_with_clan_data):
+    def test_clan_popup_header(self, all_echelons_tables):
         """
-        Clan info (tag/name/efficient/points) in the popup header
+        Clan info (tag/name/efficient/points) in the popup header of every table row
         should be visible and accurate the api info
         """
-        clan_data = all_echelons_regular_clan_data['leader_info']['clan']
-        clan_popup = LeaderboardTable().open_clan(clan_name=clan_data['name'])
-        assert_that(
-            (
-                clan_data['title'],
-                clan_data['efficient'],
-                clan_data['points'],
-            ),
-            equal_to(
-                (
-                    clan_popup.get_clan_name(),
-                    clan_popup.get_clan_efficient(),
-                    clan_popup.get_clan_points(),
-                )))
+        echelon_clans, table_rows, page_start = all_echelons_tables
+        clans_by_rank = {clan.rank: get_clan_info(clan) for clan in echelon_clans}
+        table, mismatches = LeaderboardTable(), []
+        for row_id in range(1, len(table_rows) + 1):
+            clan_data = clans_by_rank.get(page_start + row_id - 1, {})
+            clan_popup = table.open_clan(row_id=row_id)
+            popup = clan_popup.snapshot()
+            header = (popup.name, popup.efficient, popup.points)
+            if not clan_popup.header.is_displayed():
+                mismatches.append(f'row {row_id}: popup header is not visible')
+            clan_popup.close_button.click()
+            clan_popup.wait_element_hidden()
+            expected = (clan_data.get('title'), clan_data.get('efficient'), clan_data.get('points'))
+            if header != expected:
+                mismatches.append(f'row {row_id}: popup {header}, api {expected}')
+        assert not mismatches, 'Popup header is not accurate the api info:\n' + '\n'.join(mismatches)
 
     @pytest.mark.xfail(reason='Flaky test: https://github.com/VladimirPodolyan/HTFW/issues/2 & 3')
     def test_clan_popup_reward_info(self, all_echelons_regular_clan_data, all_echelons_pages_with_clan_data):